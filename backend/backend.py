@@ -1,202 +1,436 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, g, jsonify, request
 from flask_cors import CORS
 import yaml
-import requests
 import json
-import numpy as np
-import pandas as pd
-import platform
-from datetime import datetime
-import sqlite3
-import math
-from ibkr_transactions import ib_transactions
 import os
 import sys
 import time
-import psutil
-from decimal import Decimal
-from pytz import timezone
+import threading
+import atexit
 from datetime import datetime
-from options import OptionsClass
+from trade_sources import TradeSource, TradeFanOut
+from event_stream import EventBroker
+from risk_snapshot import RiskSnapshotCache
+from hedger_engine import HedgerEngine
+from hedge_pipeline import HedgePushPipeline
+from metrics import MetricsRegistry, ProfilerToggle
+from warmup import Warmup
 
-print("Working directory:", os.getcwd())
-print("sys.path:", sys.path)
+# Only light modules are imported above. pandas/numpy, the broker clients and
+# OptionsClass load on the warm-up thread, so Flask answers within a few hundred ms.
 
 app = Flask(__name__)
 CORS(app, resources={r"/*": {"origins": "*"}})  # Allow all origins
 
-ps = platform.system()
-
-# if ps == "Darwin":
-#     creds_file = "creds.yaml"
-# if ps == "Linux":
-#     creds_file = "/home/ec2-user/tt/creds.yaml"
-
 # Get the directory where this script is located
 base_dir = os.path.dirname(os.path.abspath(__file__))
-creds_file = os.path.join(base_dir, "creds.yaml")
-print(f"creds_file: {creds_file}")
-
-# creds_file = "creds.yaml"  # Modify this if needed
-
-
-try:
-    with open(creds_file, "r") as file:
-        print(f"Successfully opened {creds_file}", flush=True)
-except FileNotFoundError:
-    print(f"Error: {creds_file} not found", flush=True)
-    raise
-
-# Load credentials
-with open(creds_file, "r") as file:
-    data = yaml.safe_load(file)
-    pw = data.get("pw")[0]
-    user = data.get("user")[0]  
-
-# Tastytrade API session URL
-SESSION_URL = 'https://api.tastyworks.com/sessions'
-TRANSACTIONS_URL = 'https://api.tastyworks.com/accounts/5WY49300/transactions'
-print(f'SESSION_URL: {SESSION_URL}')
-print(f'TRANSACTIONS_URL: {TRANSACTIONS_URL}')
-
-def sanitize_data(data):
-    # Recursively replace all NaN, Infinity, and -Infinity values with None
-    if isinstance(data, float):
-        if math.isnan(data) or math.isinf(data):
-            return None
-    elif isinstance(data, dict):
-        return {k: sanitize_data(v) for k, v in data.items()}
-    elif isinstance(data, list):
-        return [sanitize_data(v) for v in data]
-    return data
-
-
-def get_session_token():
-    data = {
-        "login": user,
-        "password": pw,
-        "remember-me": True
-    }
-    headers = {'Content-Type': 'application/json'}
-    response = requests.post(SESSION_URL, data=json.dumps(data), headers=headers)
-    response.raise_for_status()
-    session_data = response.json()
-    return session_data['data']['session-token']
-
-def get_tastytrade_transactions(session_token):
-    headers = {
-        'Authorization': session_token,
-        'Content-Type': 'application/json'
-    }
-    response = requests.get(TRANSACTIONS_URL, headers=headers)
-    response.raise_for_status()
+creds_file = os.environ.get("TCN_CREDS_FILE", os.path.join(base_dir, "creds.yaml"))
+
+def load_credentials(path):
+    try:
+        with open(path, "r") as file:
+            data = yaml.safe_load(file)
+    except FileNotFoundError:
+        print(f"Error: {path} not found", flush=True)
+        raise
+    print(f"Loaded credentials from {path}", flush=True)
+    return data.get("user")[0], data.get("pw")[0]
+
+user, pw = load_credentials(creds_file)
+
+# Tastytrade transactions endpoint, relative to the session's base URL
+TRANSACTIONS_PATH = '/accounts/5WY49300/transactions'
+
+# One logged-in Tastytrade session with a keep-alive pool, shared by all requests (created during warm-up)
+tasty = None
+
+# Local trade cache, refreshed from the brokers by a background thread (opened during warm-up)
+TRADE_DB_FILE = os.environ.get("TCN_TRADE_DB", os.path.join(base_dir, "trades.db"))
+TRADE_REFRESH_SECONDS = 5
+trade_store = None
+trade_fan_out = None
+trade_source_errors = {}
+trade_refresh_lock = threading.Lock()
+trade_refresher = None
+
+# Routes give warm-up this long before answering 503
+WARMUP_WAIT_SECONDS = 30
+warmup = Warmup()
+
+def build_options():
+    # options pulls in the broker and market data stack, so it is imported on first use
+    from options import OptionsClass
+    return OptionsClass()
+
+# Shared hedging state; reads run concurrently, legacy hedge pushes and re-inits are exclusive
+engine = HedgerEngine(build_options)
+
+# Hedge pushes are suppressed while |total exposure + working hedge orders| is below this
+# (override per request with "threshold"); must be positive
+HEDGE_DELTA_THRESHOLD = float(os.environ.get('HEDGE_DELTA_THRESHOLD', 1000))
+# Sent hedge orders without fills after this long no longer count as working
+HEDGE_WORKING_TTL_SECONDS = float(os.environ.get('HEDGE_WORKING_TTL_SECONDS', 60))
+
+def hedge_fills_since(cursor):
+    if trade_store is None:
+        return cursor, []
+    return trade_store.fills_since(cursor)
+
+def hedge_quote_time(symbols):
+    # A legacy push does not name its orders; it hedges the underlyings, i.e. every
+    # subscribed symbol that is not an option ('.' prefix)
+    store = engine.quote_store
+    if store is None:
+        return None
+    if symbols is None:
+        symbols = [symbol for symbol in list(store.symbols) if not symbol.startswith('.')]
+    return store.oldest_quote_time(symbols)
+
+hedge_pipeline = HedgePushPipeline(engine, lambda: trade_store.cursor if trade_store is not None else 0,
+                                   hedge_fills_since, HEDGE_DELTA_THRESHOLD,
+                                   working_ttl=HEDGE_WORKING_TTL_SECONDS, quote_time_fn=hedge_quote_time)
+
+# Server-sent events: new fills and changed PnL/exposure figures
+events = EventBroker()
+RISK_FIGURES = ('get_total_pnl_tos', 'get_total_exposure', 'get_opt_exposure',
+                'get_hedge_pnl_tos', 'get_option_pnl_tos')
+RISK_PUBLISH_SECONDS = 1
+RISK_SNAPSHOT_TTL = 1.0
+risk_dirty = threading.Event()
+last_risk = {}
+risk_publisher = None
+
+# Latency histograms and counters, scraped from /metrics in Prometheus text format
+metrics = MetricsRegistry()
+route_latency = metrics.histogram('tcn_http_request_seconds', 'Flask route latency',
+                                  labels=('route', 'method', 'status'))
+options_latency = metrics.histogram('tcn_options_call_seconds', 'OptionsClass computation time', labels=('call',))
+trade_refresh_latency = metrics.histogram('tcn_trade_refresh_seconds', 'Broker fan-out plus trade store upsert')
+hedge_decision_latency = metrics.histogram('tcn_hedge_decision_to_order_seconds',
+                                           'Exposure read to hedge orders placed')
+hedge_tick_latency = metrics.histogram('tcn_hedge_tick_to_order_seconds',
+                                       'Age of the newest quote behind the book when hedge orders were placed')
+hedge_pushes = metrics.counter('tcn_hedge_push_total', 'Hedge push requests by outcome', labels=('status',))
+metrics.gauge('tcn_trade_store_cursor', 'Latest trade store sequence number',
+              lambda: trade_store.cursor if trade_store is not None else None)
+metrics.gauge('tcn_stream_subscribers', 'Connected /stream clients', lambda: events.subscriber_count)
+metrics.gauge('tcn_risk_snapshot_version', 'PnL/exposure snapshot version', lambda: risk_cache.version)
+
+# On-demand cProfile of request handling; TCN_PROFILE=1 starts it at boot
+profiler = ProfilerToggle()
+if os.environ.get('TCN_PROFILE') == '1':
+    profiler.start()
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+    g.profile = profiler.begin()
+    warmup.start()
+
+@app.after_request
+def record_request_latency(response):
+    route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    route_latency.observe(time.perf_counter() - g.request_started, route, request.method, response.status_code)
+    return response
+
+@app.teardown_request
+def stop_request_profile(error=None):
+    profiler.end(g.pop('profile', None))
+
+def get_tastytrade_transactions(start_date=None):
+    import pandas as pd
+    params = {'start-date': start_date} if start_date else None
+    response = tasty.get(TRANSACTIONS_PATH, params=params)
     transactions_data = response.json()
     return pd.DataFrame(transactions_data['data']['items'])
 
-def close_session(session_token):
-    headers = {
-        'Authorization': session_token,
-        'Content-Type': 'application/json'
-    }
-    response = requests.delete(SESSION_URL, headers=headers)
-    response.raise_for_status()
-
-@app.route('/trades', methods=['GET'], strict_slashes=False)
-def fetch_trades():
-    try:
-        print('Start Trade Feed Process...')
-        # Get session token and transactions
-        session_token = get_session_token()
-        transactions_df = get_tastytrade_transactions(session_token)
+def format_timestamps(series):
+    # 'YYYY-mm-dd HH:MM:SS.mmm' for the whole column at once (%f is microseconds, trim to millis)
+    return series.dt.strftime('%Y-%m-%d %H:%M:%S.%f').str[:-3]
+
+def start_date_for(source):
+    import pandas as pd
+    # Re-fetch from the day before the newest cached fill so late corrections are picked up
+    latest = trade_store.latest_executed_at(source)
+    if latest is None:
+        return None
+    return (pd.Timestamp(latest[:10]) - pd.Timedelta(days=1)).strftime('%Y-%m-%d')
+
+class TastytradeSource(TradeSource):
+    name = 'Tastytrade'
+
+    def fetch(self):
+        import pandas as pd
+        # Reuses the cached Tastytrade session
+        transactions_df = get_tastytrade_transactions(start_date_for(self.name))
+        if transactions_df.empty:
+            return transactions_df
         transactions_df = transactions_df[transactions_df['transaction-type'] == 'Trade']
-        transactions_df['source'] = 'Tastytrade'
-        close_session(session_token)
         # print(transactions_df.head())
 
         # Convert 'executed-at' timestamps from UTC to CT
         # transactions_df['executed-at'] = pd.to_datetime(transactions_df['executed-at']).dt.tz_convert('US/Central').dt.strftime('%Y-%m-%d %H:%M:%S.%3f')
-        transactions_df['executed-at'] = pd.to_datetime(transactions_df['executed-at']) \
-                .dt.tz_convert('US/Central') \
-                .apply(lambda x: x.strftime('%Y-%m-%d %H:%M:%S.') + f"{x.microsecond // 1000:03d}")
-
-        print('placeholder Close Potential Hung Session')
-        for process in psutil.process_iter(['pid', 'name']):
-            try:
-                if 'python' in process.info['name'].lower():  # Check if the process is Python
-                    for conn in psutil.net_connections(kind='inet'):  # Use net_connections
-                        if conn.laddr.port == 4001 and conn.pid == process.info['pid']:  # Check port and PID match
-                            print(f"Killing process {process.info['name']} (PID: {process.info['pid']}) on port 4001")
-                            process.terminate()  # Terminate the process
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                # Skip processes that no longer exist or cannot be accessed
-                continue
-        
-        # dfib['Time'] are CT timestamps, can you change the formatting to match this 
+        transactions_df['executed-at'] = format_timestamps(
+            pd.to_datetime(transactions_df['executed-at']).dt.tz_convert('US/Central'))
+        return transactions_df
 
-        try:
-            dfib = pd.DataFrame()
-            dfib = ib_transactions()
-            dfib['source'] = 'IBKR'
-            dfib.drop(columns=['Currency_y'], inplace=True)
-            dfib['Time'] = pd.to_datetime(dfib['Time'], format='%Y%m%d  %H:%M:%S') \
-                .dt.tz_localize('US/Central') \
-                .apply(lambda x: x.strftime('%Y-%m-%d %H:%M:%S.') + f"{x.microsecond // 1000:03d}")
-                    
-
-            dfib.rename(columns={
-                'Account': 'account-number',
-                'Symbol': 'symbol',
-                'SecType': 'instrument-type',
-                'Currency_x': 'currency',
-                'Action': 'action',
-                'Quantity': 'quantity',
-                'Price': 'price',
-                'Time': 'executed-at',
-                'Account': 'account-number',
-                'ExecId': 'exec-id',
-                'OrderId': 'order-id',
-                'Exchange': 'exchange',
-                'Liquidation': 'ext-group-id',
-                'Commission': 'commission',
-                # Add more column renames as needed
-            }, inplace=True)
-        except Exception as e:
-            print(f"Error (IB Feed): {e}")
-            dfib = pd.DataFrame()
-            
 
-        # dfub = pd.DataFrame()
-        transactions_df = pd.concat([transactions_df, dfib], ignore_index=True)
-        transactions_df.sort_values(by='executed-at', ascending=False, inplace=True)
+class IBKRSource(TradeSource):
+    name = 'IBKR'
 
+    def __init__(self):
+        from ibkr_connection import IBKRConnectionManager
+        # Hung-session cleanup happens inside the manager, off the request path
+        self.connection = IBKRConnectionManager(ib_transactions, port=4001)
 
-        # Sanitize data to handle NaN, Infinity, and -Infinity
-        transactions_json = transactions_df.to_dict(orient='records')
-        sanitized_data = sanitize_data(transactions_json)
+    def fetch(self):
+        import pandas as pd
+        # dfib['Time'] are CT timestamps, can you change the formatting to match this 
+        dfib = self.connection.fetch()
+        dfib.drop(columns=['Currency_y'], inplace=True)
+        dfib['Time'] = format_timestamps(
+            pd.to_datetime(dfib['Time'], format='%Y%m%d  %H:%M:%S').dt.tz_localize('US/Central'))
+
+        return dfib.rename(columns={
+            'Account': 'account-number',
+            'Symbol': 'symbol',
+            'SecType': 'instrument-type',
+            'Currency_x': 'currency',
+            'Action': 'action',
+            'Quantity': 'quantity',
+            'Price': 'price',
+            'Time': 'executed-at',
+            'ExecId': 'exec-id',
+            'OrderId': 'order-id',
+            'Exchange': 'exchange',
+            'Liquidation': 'ext-group-id',
+            'Commission': 'commission',
+            # Add more column renames as needed
+        })
+
+
+def ib_transactions():
+    # The IB API client is only imported when the first IBKR fetch runs
+    from ibkr_transactions import ib_transactions as fetch_ib_transactions
+    return fetch_ib_transactions()
+
+def warm_up_trade_store():
+    global trade_store
+    from trade_store import TradeStore  # pandas and numpy
+    trade_store = TradeStore(TRADE_DB_FILE)
+
+def warm_up_brokers():
+    global tasty, trade_fan_out
+    from tastytrade_client import TastytradeClient
+    tasty = TastytradeClient(user, pw)
+    atexit.register(tasty.close)
+    # Brokers are queried in parallel; add new TradeSource subclasses here (e.g. Schwab)
+    trade_fan_out = TradeFanOut([TastytradeSource(), IBKRSource()])
+
+def warm_up_first_trades():
+    # Fill the blotter cache before the UI asks for it, then keep it fresh
+    if not (warmup.succeeded('trade_store') and warmup.succeeded('brokers')):
+        raise RuntimeError("skipped, the trade store or broker clients failed to start")
+    try:
+        refresh_trades()
+    finally:
+        start_trade_refresher()
+
+def warm_up_options():
+    import options  # noqa: F401  (first /option/init then skips the import)
+
+warmup.add('trade_store', warm_up_trade_store)
+warmup.add('brokers', warm_up_brokers)
+warmup.add('first_trades', warm_up_first_trades, required=False)
+warmup.add('options', warm_up_options, required=False)
+
+def wait_for(*steps):
+    """None once the warm-up steps succeeded, otherwise a 503 response with the warm-up progress."""
+    deadline = time.monotonic() + WARMUP_WAIT_SECONDS
+    for step in steps:
+        if not warmup.wait(step, max(0.0, deadline - time.monotonic())):
+            response = jsonify(dict(warmup.status(), error=f"backend not ready: {step}"))
+            response.status_code = 503
+            return response
+    return None
+
+def refresh_trades():
+    """Pull broker deltas into the local trade store; returns the number of changed rows."""
+    global trade_source_errors
+    with trade_refresh_lock:
+        print('Start Trade Feed Process...')
+        started = time.perf_counter()
+        transactions_df, trade_source_errors = trade_fan_out.fetch()
+        for name, error in trade_source_errors.items():
+            print(f"Error ({name} Feed): {error}")
+        # NaN, Infinity and -Infinity are written as null by the store's columnar encoder
+        previous_cursor = trade_store.cursor
+        changed = trade_store.upsert(transactions_df)
+        trade_refresh_latency.observe(time.perf_counter() - started)
+        if changed:
+            cursor, trades_json = trade_store.since(previous_cursor)
+            events.publish('trades', f'{{"cursor": {cursor}, "trades": {trades_json}}}')
+            invalidate_risk()
+        return changed
+
+def trade_refresh_loop():
+    # Without the trade store or broker clients every round would fail the same way
+    if not (warmup.wait('trade_store') and warmup.wait('brokers')):
+        print("Trade refresher not started: a required warm-up step failed")
+        return
+    while True:
+        try:
+            changed = refresh_trades()
+            if changed:
+                print(f'Trade store: {changed} new or changed trades (cursor {trade_store.cursor})')
+        except Exception as e:
+            print(f"Error (trade refresh): {e}")
+        time.sleep(TRADE_REFRESH_SECONDS)
+
+def start_trade_refresher():
+    global trade_refresher
+    if trade_refresher is None:
+        trade_refresher = threading.Thread(target=trade_refresh_loop, name='trade-refresher', daemon=True)
+        trade_refresher.start()
+
+def compute_risk_figures():
+    # One pass over the same OptionsClass state for every PnL/exposure figure
+    with engine.read() as options:
+        figures = {}
+        for name in RISK_FIGURES:
+            with options_latency.time(name):
+                figures[name] = float(getattr(options, name)())
+        return figures
+
+# Keyed to the engine generation, so figures of a book replaced by /option/init are never served
+risk_cache = RiskSnapshotCache(compute_risk_figures, ttl=RISK_SNAPSHOT_TTL, generation_fn=lambda: engine.generation)
+
+def format_figure(value):
+    # Round and format with thousands separator
+    return format(round(value, 2), ',')
+
+def invalidate_risk():
+    """A fill or hedge push changed positions: drop the cached snapshot and wake the publisher."""
+    risk_cache.invalidate()
+    risk_dirty.set()
+
+def risk_publish_loop():
+    """Recompute PnL/exposure once for all stream clients and publish only figures that changed."""
+    while True:
+        # Wake early when a fill or hedge push lands, otherwise re-mark every RISK_PUBLISH_SECONDS
+        risk_dirty.wait(RISK_PUBLISH_SECONDS)
+        risk_dirty.clear()
+        if not engine.ready or events.subscriber_count == 0:
+            continue
+        try:
+            figures = {name: format_figure(value) for name, value in risk_cache.get()[0].items()}
+        except Exception as e:
+            print(f"Error (risk publish): {e}")
+            continue
+        changed = {name: value for name, value in figures.items() if last_risk.get(name) != value}
+        if changed:
+            last_risk.update(changed)
+            events.publish('risk', {"result": changed, "timestamp": datetime.now().isoformat()})
+
+def start_risk_publisher():
+    global risk_publisher
+    if risk_publisher is None:
+        risk_publisher = threading.Thread(target=risk_publish_loop, name='risk-publisher', daemon=True)
+        risk_publisher.start()
+
+@app.route('/stream', methods=['GET'])
+def stream():
+    """
+    Server-Sent Events channel. Emits 'hello' with the current trade cursor,
+    then 'trades' ({"cursor", "trades"}) with new or changed fills and
+    'risk' ({"result", "timestamp"}) with only the PnL/exposure figures that moved.
+    """
+    not_ready = wait_for('trade_store')
+    if not_ready is not None:
+        return not_ready
+    start_trade_refresher()
+    start_risk_publisher()
+    q = events.subscribe()
+    initial = [events.format('hello', {"cursor": trade_store.cursor})]
+    if last_risk:
+        initial.append(events.format('risk', {"result": dict(last_risk), "timestamp": datetime.now().isoformat()}))
+    risk_dirty.set()
+    return Response(events.stream(q, initial), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
-        # print(sanitized_data, flush=True)
-        # print("This is a log message from Python!")
-        return jsonify(sanitized_data)
+@app.route('/trades', methods=['GET'], strict_slashes=False)
+def fetch_trades():
+    """
+    Serve the blotter from the local trade store.
+
+    Without parameters the full blotter is returned as a JSON array. With
+    ?since=<cursor> only rows added or changed after that cursor are returned,
+    together with the new cursor: {"cursor": n, "trades": [...], "errors": {...}}.
+    errors names the brokers missing from the last refresh; the rows from the
+    other brokers are still served.
+    """
+    try:
+        not_ready = wait_for('trade_store', 'brokers')
+        if not_ready is not None:
+            return not_ready
+        start_trade_refresher()
+        if trade_store.cursor == 0 and not warmup.wait('first_trades', WARMUP_WAIT_SECONDS):
+            # Nothing cached and the warm-up fetch failed, fetch synchronously once
+            refresh_trades()
+
+        since = request.args.get('since', type=int)
+        cursor, trades_json = trade_store.since(since or 0)
+        if since is None:
+            response = Response(trades_json, mimetype='application/json')
+            if trade_source_errors:
+                response.headers['X-Failed-Sources'] = ','.join(trade_source_errors)
+            return response
+        errors_json = json.dumps(trade_source_errors)
+        return Response(f'{{"cursor": {cursor}, "trades": {trades_json}, "errors": {errors_json}}}',
+                        mimetype='application/json')
     except Exception as e:
         return jsonify({"error": str(e)})
 
 
-# myopt = OptionsClass()
-
 @app.route('/option/init', methods=['GET'])
 def option_init():
-    global myopt
     try:
-        myopt = OptionsClass()  # (Re)initialize the options object
+        with options_latency.time('init'):
+            engine.reinit()  # (Re)initialize the options object, swapped in once fully built
+        # Working hedge orders stay tracked: they are still live at the broker
+        # (POST /option/reset_hedge_orders forgets them)
+        last_risk.clear()
+        risk_dirty.set()
         timestamp = datetime.now().isoformat()
         return jsonify({"result": "Option initialized", "timestamp": timestamp})
     except Exception as e:
         return jsonify({"error": str(e)})
 
+@app.route('/option/snapshot', methods=['GET'])
+def option_snapshot():
+    """
+    Every PnL/exposure figure from one computation, cached for RISK_SNAPSHOT_TTL
+    seconds. Sends an ETag; a matching If-None-Match gets 304 Not Modified.
+    """
+    try:
+        figures, version, etag, computed_at = risk_cache.get()
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+        else:
+            response = jsonify({
+                "result": {name: format_figure(value) for name, value in figures.items()},
+                "version": version,
+                "timestamp": computed_at
+            })
+        response.set_etag(etag)
+        return response
+    except Exception as e:
+        return jsonify({"error": str(e)})
+
 @app.route('/option/get_total_pnl_tos', methods=['GET'])
 def get_total_pnl_tos():
     try:
-        result = myopt.get_total_pnl_tos()
+        result = risk_cache.get()[0]['get_total_pnl_tos']
         # Round and format with thousands separator
         rounded_result = format(round(float(result), 2), ',')
         timestamp = datetime.now().isoformat()
@@ -207,7 +441,7 @@ def get_total_pnl_tos():
 @app.route('/option/get_total_exposure', methods=['GET'])
 def get_total_exposure():
     try:
-        result = myopt.get_total_exposure()
+        result = risk_cache.get()[0]['get_total_exposure']
         # Round and format with thousands separator
         rounded_result = format(round(float(result), 2), ',')
         timestamp = datetime.now().isoformat()
@@ -218,7 +452,7 @@ def get_total_exposure():
 @app.route('/option/get_opt_exposure', methods=['GET'])
 def get_opt_exposure():
     try:
-        result = myopt.get_opt_exposure()
+        result = risk_cache.get()[0]['get_opt_exposure']
         # Round and format with thousands separator
         rounded_result = format(round(float(result), 2), ',')
         timestamp = datetime.now().isoformat()
@@ -229,7 +463,7 @@ def get_opt_exposure():
 @app.route('/option/get_hedge_pnl_tos', methods=['GET'])
 def get_hedge_pnl_tos():
     try:
-        result = myopt.get_hedge_pnl_tos()
+        result = risk_cache.get()[0]['get_hedge_pnl_tos']
         # Round and format with thousands separator
         rounded_result = format(round(float(result), 2), ',')
         timestamp = datetime.now().isoformat()
@@ -240,7 +474,7 @@ def get_hedge_pnl_tos():
 @app.route('/option/get_option_pnl_tos', methods=['GET'])
 def get_option_pnl_tos():
     try:
-        result = myopt.get_option_pnl_tos()
+        result = risk_cache.get()[0]['get_option_pnl_tos']
         # Round and format with thousands separator
         rounded_result = format(round(float(result), 2), ',')
         timestamp = datetime.now().isoformat()
@@ -250,13 +484,72 @@ def get_option_pnl_tos():
 
 @app.route('/option/push_hedge_trades', methods=['POST'])
 def push_hedge_trades():
+    """
+    Idempotent hedge push. Send an Idempotency-Key header (or "idempotency_key"
+    in the JSON body) so retries of the same tick never hedge twice; an optional
+    positive "threshold" overrides HEDGE_DELTA_THRESHOLD. "status" is one of sent,
+    skipped, duplicate or in_flight.
+    """
     try:
-        myopt.push_hedge_trades_tos()
+        body = request.get_json(silent=True) or {}
+        key = request.headers.get('Idempotency-Key') or body.get('idempotency_key')
+        threshold = body.get('threshold')
+        result = hedge_pipeline.submit(key, None if threshold is None else float(threshold))
+        hedge_pushes.inc(result['status'])
+        if result['status'] == 'sent':
+            invalidate_risk()
+            hedge_decision_latency.observe(result['decision_to_order_ms'] / 1000)
+            if 'tick_to_order_ms' in result:
+                hedge_tick_latency.observe(result['tick_to_order_ms'] / 1000)
         timestamp = datetime.now().isoformat()
-        return jsonify({"result": "push hedge trades executed", "timestamp": timestamp})
+        return jsonify(dict(result, timestamp=timestamp))
     except Exception as e:
         return jsonify({"error": str(e)})
 
+@app.route('/option/reset_hedge_orders', methods=['POST'])
+def reset_hedge_orders():
+    """Stop counting sent hedge orders as working, e.g. after cancelling them at the broker."""
+    try:
+        working = hedge_pipeline.reset()
+        timestamp = datetime.now().isoformat()
+        return jsonify({"result": "working hedge orders cleared", "working_exposure": working,
+                        "timestamp": timestamp})
+    except Exception as e:
+        return jsonify({"error": str(e)})
+
+@app.route('/health', methods=['GET'])
+def health():
+    """
+    Readiness and warm-up progress: {"status", "ready", "elapsed", "steps"}. status is
+    starting, ready, degraded (an optional step failed) or failed; 503 until ready.
+    """
+    status = warmup.status()
+    response = jsonify(status)
+    if not status['ready']:
+        response.status_code = 503
+    return response
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Route, OptionsClass, trade refresh and hedge latency histograms in Prometheus text format."""
+    return Response(metrics.render(), content_type=metrics.content_type)
+
+@app.route('/debug/profile', methods=['GET', 'POST'])
+def debug_profile():
+    """
+    POST {"action": "start"} begins profiling every request; POST {"action": "stop"}
+    ends it and returns the top functions by cumulative time as text. GET reports
+    whether the profiler is running.
+    """
+    if request.method == 'GET':
+        return jsonify({"active": profiler.active, "started_at": profiler.started_at if profiler.active else None})
+    action = (request.get_json(silent=True) or {}).get('action', request.args.get('action'))
+    if action == 'start':
+        return jsonify({"active": True, "started_at": profiler.start()})
+    if action == 'stop':
+        return Response(profiler.stop() or 'profiler was not running\n', mimetype='text/plain')
+    return jsonify({"error": "action must be start or stop"}), 400
+
 # Toolbar action endpoints
 @app.route('/toolbar/play', methods=['POST'])
 def toolbar_play():
@@ -291,5 +584,25 @@ def toolbar_stop():
     except Exception as e:
         return jsonify({"status": "error", "error": str(e)})
 
+def serve(port=5000, threads=16):
+    """
+    Serve with waitress (multi-threaded production WSGI server) when it is
+    installed; pass --dev to use the Flask development server instead.
+    Worker threads rather than processes, so every request shares one
+    HedgerEngine, trade store and event stream. Warm-up starts alongside, so
+    /health answers while the brokers and trade store are still loading.
+    """
+    warmup.start()
+    start_risk_publisher()
+    if '--dev' not in sys.argv:
+        try:
+            from waitress import serve as waitress_serve
+        except ImportError:
+            print("waitress not installed, falling back to the Flask development server")
+        else:
+            waitress_serve(app, host='127.0.0.1', port=port, threads=threads)
+            return
+    app.run(port=port, debug=True, use_reloader=False, threaded=True)
+
 if __name__ == "__main__":
-    app.run(port=5000, debug=True, use_reloader=False)
+    serve()
@@ -0,0 +1,84 @@
+import json
+import queue
+import threading
+
+# Queued in place of an event when a subscriber is dropped; its stream() then ends
+_DROPPED = object()
+
+
+class EventBroker:
+    """
+    Fan-out of Server-Sent Events to every connected client.
+
+    Each event is serialized once and queued per subscriber; a client that
+    falls too far behind is dropped instead of slowing the publisher down.
+    Its stream ends, so the client's EventSource reconnects and resyncs from
+    its cursor.
+    """
+
+    def __init__(self, max_queue=256):
+        self.max_queue = max_queue
+        self._lock = threading.Lock()
+        self._subscribers = set()
+
+    @property
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+    def subscribe(self):
+        q = queue.Queue(maxsize=self.max_queue)
+        with self._lock:
+            self._subscribers.add(q)
+        return q
+
+    def unsubscribe(self, q):
+        with self._lock:
+            self._subscribers.discard(q)
+
+    @staticmethod
+    def format(event, data):
+        """data may be an object or an already encoded JSON string."""
+        if not isinstance(data, str):
+            data = json.dumps(data)
+        return f"event: {event}\ndata: {data}\n\n"
+
+    def publish(self, event, data):
+        message = self.format(event, data)
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for q in subscribers:
+            try:
+                q.put_nowait(message)
+            except queue.Full:
+                self.drop(q)
+
+    def drop(self, q):
+        """Unsubscribe a lagging client and queue the sentinel that ends its stream."""
+        self.unsubscribe(q)
+        while True:
+            try:
+                q.put_nowait(_DROPPED)
+                return
+            except queue.Full:
+                # Discard the oldest event to make room; the client resyncs anyway
+                try:
+                    q.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def stream(self, q, initial=(), heartbeat=15):
+        """Generator for a streaming response; sends a comment line when idle to keep proxies open."""
+        try:
+            for message in initial:
+                yield message
+            while True:
+                try:
+                    message = q.get(timeout=heartbeat)
+                except queue.Empty:
+                    yield ": keepalive\n\n"
+                    continue
+                if message is _DROPPED:
+                    return
+                yield message
+        finally:
+            self.unsubscribe(q)
@@ -0,0 +1,236 @@
+import threading
+import time
+
+
+def signed_quantity(trade):
+    """Shares bought (+) or sold (-) by a blotter row; Tastytrade and IBKR spell the side differently."""
+    action = str(trade.get('action') or '').upper()
+    quantity = abs(float(trade.get('quantity') or 0))
+    return -quantity if action.startswith(('SELL', 'SLD')) else quantity
+
+
+class WorkingHedge:
+    """
+    Orders of a sent hedge and how much of each has filled.
+
+    Orders are dicts with symbol, signed quantity, reference price and, when the
+    broker returned one, order_id. Blotter fills after `cursor` are matched by
+    order id, or by symbol and side for orders without one. An order with symbol
+    None stands for a push whose orders are unknown (push_hedge_trades_tos); no
+    fill can be matched to it, so it is dropped once exposure has moved
+    `threshold` away from what that push hedged. Any order still working after
+    `ttl` seconds is dropped too, e.g. one the broker rejected or whose fills
+    never reached the trade store.
+    """
+
+    def __init__(self, cursor, ttl):
+        self.orders = []
+        self.cursor = cursor
+        self.ttl = ttl
+        self._matched = set()
+
+    def add(self, orders):
+        self.orders = [order for order in self.orders if abs(order['quantity'] - order['filled']) > 1e-9]
+        placed_at = time.monotonic()
+        self.orders.extend(dict(order, filled=0.0, placed_at=placed_at) for order in orders)
+
+    def expire(self, exposure, threshold):
+        """Drop orders past their ttl, and unknown orders once exposure has moved threshold from what they hedged."""
+        now = time.monotonic()
+        self.orders = [
+            order for order in self.orders
+            if now - order['placed_at'] < self.ttl
+            and not (order['symbol'] is None and abs(exposure + order['quantity']) >= threshold)
+        ]
+
+    def apply_fills(self, fills):
+        for key, trade in fills:
+            # A corrected fill comes back under the same key; count it once
+            if key in self._matched:
+                continue
+            quantity = signed_quantity(trade)
+            for order in self.orders:
+                unfilled = order['quantity'] - order['filled']
+                if abs(unfilled) <= 1e-9 or order['symbol'] is None:
+                    continue
+                if order.get('order_id') is not None:
+                    if str(order['order_id']) != str(trade.get('order-id')):
+                        continue
+                    take = quantity
+                elif order['symbol'] != trade.get('symbol') or unfilled * quantity <= 0:
+                    continue
+                else:
+                    take = quantity
+                # Never fill past the order, in either direction
+                order['filled'] += min(max(take, 0.0), unfilled) if unfilled > 0 else max(min(take, 0.0), unfilled)
+                self._matched.add(key)
+                break
+
+    def unfilled(self):
+        """Signed shares still working per symbol."""
+        remaining = {}
+        for order in self.orders:
+            left = order['quantity'] - order['filled']
+            if abs(left) > 1e-9:
+                remaining[order['symbol']] = remaining.get(order['symbol'], 0.0) + left
+        return remaining
+
+    @property
+    def exposure(self):
+        """Exposure the unfilled orders will add once they fill."""
+        return sum((order['quantity'] - order['filled']) * order['price'] for order in self.orders)
+
+    @property
+    def done(self):
+        return not self.unfilled()
+
+
+class HedgePushPipeline:
+    """
+    Gatekeeper in front of the OptionsClass hedge orders.
+
+    - Idempotency: a repeated key returns the first call's result without sending again.
+    - Single flight: a push that arrives while another is running is rejected, not queued.
+    - Working orders: exposure does not include orders that have not filled, so their
+      exposure is added before deciding and netted out of new orders. They stop
+      counting as their fills reach the trade store, after working_ttl seconds, or
+      on reset().
+    - Threshold: nothing is sent while that net exposure is below delta_threshold.
+
+    With OptionsClass.hedge_orders() and send_hedge_orders(orders), exposure is read
+    and orders are computed under the engine's read lock and sent after it is
+    released, so PnL/exposure readers never wait on the broker. An OptionsClass
+    with only push_hedge_trades_tos() computes and sends in one call, which takes
+    the write lock like any other change to the book, and whose orders are unknown,
+    so the whole push counts as working until exposure moves delta_threshold away
+    from what it hedged (its fills landing, or the market moving) or working_ttl
+    passes.
+
+    A sent result carries decision_to_order_ms (exposure read to orders placed) and,
+    given quote_time_fn, tick_to_order_ms: from the quote the hedge was priced on
+    to orders placed. quote_time_fn(symbols) returns the epoch time of the oldest
+    latest quote among the hedged symbols (None for a legacy push, whose symbols
+    are unknown), or None when there is no quote.
+    """
+
+    def __init__(self, engine, fills_cursor, fills_since, delta_threshold, key_ttl=300,
+                 working_ttl=60, quote_time_fn=None):
+        if not delta_threshold > 0:
+            raise ValueError(f"delta_threshold must be positive, got {delta_threshold}")
+        self.engine = engine
+        self.quote_time_fn = quote_time_fn
+        self.fills_cursor = fills_cursor
+        self.fills_since = fills_since  # cursor -> (new cursor, [(trade key, trade dict)]) changed after it
+        self.delta_threshold = delta_threshold
+        self.key_ttl = key_ttl
+        self.working_ttl = working_ttl
+        self._in_flight = threading.Lock()
+        self._keys_lock = threading.Lock()
+        self._results = {}
+        self._working = None  # WorkingHedge of the last send until it has filled
+
+    def _cached(self, key):
+        now = time.monotonic()
+        with self._keys_lock:
+            for stale in [k for k, (expires, _) in self._results.items() if expires < now]:
+                del self._results[stale]
+            entry = self._results.get(key)
+            return None if entry is None else entry[1]
+
+    def _remember(self, key, result):
+        if key is not None:
+            with self._keys_lock:
+                self._results[key] = (time.monotonic() + self.key_ttl, result)
+
+    def working_exposure(self, exposure, threshold):
+        """Exposure of sent hedge orders still waiting for fills (0 once they have all filled or expired)."""
+        working = self._working
+        if working is None:
+            return 0.0
+        working.cursor, fills = self.fills_since(working.cursor)
+        working.apply_fills(fills)
+        working.expire(exposure, threshold)
+        if working.done:
+            self._working = None
+            return 0.0
+        return working.exposure
+
+    def _net_orders(self, orders):
+        """New orders less what the working hedge will still buy or sell per symbol."""
+        unfilled = self._working.unfilled() if self._working is not None else {}
+        net = []
+        for order in orders:
+            quantity = order['quantity'] - unfilled.pop(order['symbol'], 0.0)
+            if abs(quantity) > 1e-9:
+                net.append(dict(order, quantity=quantity))
+        return net
+
+    def _quote_time(self, symbols):
+        return None if self.quote_time_fn is None else self.quote_time_fn(symbols)
+
+    def _skip_reason(self, exposure, working, threshold):
+        if abs(exposure + working) >= threshold:
+            return None
+        if working:
+            return f"previous hedge still working ({working:,.2f} unfilled)"
+        return f"exposure {exposure:,.2f} below threshold {threshold:,.2f}"
+
+    def submit(self, key=None, delta_threshold=None):
+        if key is not None:
+            cached = self._cached(key)
+            if cached is not None:
+                return dict(cached, status='duplicate')
+
+        threshold = self.delta_threshold if delta_threshold is None else delta_threshold
+        if not threshold > 0:
+            raise ValueError(f"threshold must be positive, got {threshold}")
+        if not self._in_flight.acquire(blocking=False):
+            return {"result": "hedge push already in flight", "status": "in_flight"}
+        try:
+            with self.engine.read() as options:
+                # Every re-init builds the same OptionsClass, so this holds for the locked section below
+                legacy = not hasattr(options, 'hedge_orders')
+            # push_hedge_trades_tos() computes and sends in one call, holding the book exclusively
+            with (self.engine.write() if legacy else self.engine.read()) as options:
+                decided_at = time.time()
+                exposure = float(options.get_total_exposure())
+                working = self.working_exposure(exposure, threshold)
+                reason = self._skip_reason(exposure, working, threshold)
+                if reason is None:
+                    if self._working is None:
+                        # Fills of this push can land while it is being sent
+                        self._working = WorkingHedge(self.fills_cursor(), self.working_ttl)
+                    if legacy:
+                        quote_time = self._quote_time(None)
+                        options.push_hedge_trades_tos()
+                        sent_at = time.time()
+                        self._working.add([{"symbol": None, "quantity": -exposure, "price": 1.0}])
+                    else:
+                        orders = self._net_orders(options.hedge_orders())
+                        quote_time = self._quote_time([order['symbol'] for order in orders])
+            if reason is None and not legacy:
+                if not orders:
+                    reason = "working orders already cover exposure"
+                else:
+                    # Broker round-trip outside the lock
+                    sent = options.send_hedge_orders(orders) or orders
+                    sent_at = time.time()
+                    self._working.add(sent)
+
+            if reason is None:
+                result = {"result": "push hedge trades executed", "status": "sent", "exposure": exposure,
+                          "working_exposure": working, "decision_to_order_ms": (sent_at - decided_at) * 1000}
+                if quote_time:
+                    result["tick_to_order_ms"] = (sent_at - quote_time) * 1000
+            else:
+                result = {"result": f"hedge skipped: {reason}", "status": "skipped", "exposure": exposure,
+                          "working_exposure": working}
+            self._remember(key, result)
+            return result
+        finally:
+            self._in_flight.release()
+
+    def reset(self):
+        """Forget working orders, e.g. after they were cancelled at the broker; returns their exposure."""
+        working, self._working = self._working, None
+        return 0.0 if working is None else working.exposure
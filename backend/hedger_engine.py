@@ -0,0 +1,91 @@
+import threading
+from contextlib import contextmanager
+
+
+class ReadWriteLock:
+    """Any number of concurrent readers or a single writer; waiting writers block new readers."""
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = False
+        self._writers_waiting = 0
+
+    @contextmanager
+    def read(self):
+        with self._cond:
+            while self._writer or self._writers_waiting:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write(self):
+        with self._cond:
+            self._writers_waiting += 1
+            while self._writer or self._readers:
+                self._cond.wait()
+            self._writers_waiting -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer = False
+                self._cond.notify_all()
+
+
+class HedgerEngine:
+    """
+    Owns the OptionsClass instance shared by all Flask request threads.
+
+    PnL/exposure reads run concurrently under the read lock; a hedge push that
+    changes the book (push_hedge_trades_tos) takes the write lock. A re-init builds the new OptionsClass before swapping it in,
+    so readers never see half-built state.
+
+    quote_store is the QuoteStore the current OptionsClass prices from, taken from
+    its quote_store attribute at re-init; None when it exposes none.
+    """
+
+    def __init__(self, factory):
+        self.factory = factory
+        self.generation = 0
+        self._options = None
+        self.quote_store = None
+        self._lock = ReadWriteLock()
+        self._init_lock = threading.Lock()
+
+    @property
+    def ready(self):
+        return self._options is not None
+
+    def reinit(self):
+        with self._init_lock:
+            # Slow broker/market setup happens outside the read/write lock
+            options = self.factory()
+            with self._lock.write():
+                self._options = options
+                self.quote_store = getattr(options, 'quote_store', None)
+                self.generation += 1
+            return self.generation
+
+    def _current(self):
+        if self._options is None:
+            raise RuntimeError("Options not initialized, call /option/init first")
+        return self._options
+
+    @contextmanager
+    def read(self):
+        with self._lock.read():
+            yield self._current()
+
+    @contextmanager
+    def write(self):
+        with self._lock.write():
+            yield self._current()
@@ -0,0 +1,66 @@
+import os
+import threading
+
+import psutil
+
+
+class IBKRConnectionManager:
+    """
+    Owns the lifecycle of the IB API connection used for the blotter.
+
+    Calls are serialized so only one client is ever connected to the gateway
+    from this backend. Hung sessions on the API port are cleaned up once at
+    startup and after a failed fetch, instead of sweeping every process on
+    every request.
+    """
+
+    def __init__(self, fetch_fn, port=4001):
+        self.fetch_fn = fetch_fn
+        self.port = port
+        self._lock = threading.Lock()
+        self._needs_cleanup = True
+
+    def fetch(self):
+        with self._lock:
+            if self._needs_cleanup:
+                self.cleanup_hung_sessions()
+                self._needs_cleanup = False
+            try:
+                return self.fetch_fn()
+            except Exception:
+                # The client may have been left half-connected; clear it before the next attempt
+                self._needs_cleanup = True
+                raise
+
+    def _pids_on_port(self):
+        try:
+            # One enumeration of all inet sockets on the host
+            return {conn.pid for conn in psutil.net_connections(kind='inet')
+                    if conn.pid and conn.laddr and conn.laddr.port == self.port}
+        except psutil.AccessDenied:
+            # macOS needs root for the system-wide listing; fall back to per-process sockets
+            pids = set()
+            for process in psutil.process_iter(['pid', 'name']):
+                try:
+                    if 'python' in (process.info['name'] or '').lower():
+                        if any(conn.laddr and conn.laddr.port == self.port
+                               for conn in process.net_connections(kind='inet')):
+                            pids.add(process.info['pid'])
+                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    continue
+            return pids
+
+    def cleanup_hung_sessions(self):
+        """Terminate stray Python processes (never this one) still holding the API port."""
+        killed = []
+        for pid in self._pids_on_port() - {os.getpid()}:
+            try:
+                process = psutil.Process(pid)
+                if 'python' in process.name().lower():
+                    print(f"Killing process {process.name()} (PID: {pid}) on port {self.port}")
+                    process.terminate()
+                    killed.append(pid)
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                # Skip processes that no longer exist or cannot be accessed
+                continue
+        return killed
@@ -0,0 +1,198 @@
+import bisect
+import cProfile
+import io
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+
+# Seconds; covers sub-millisecond cache hits up to slow broker calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + '}'
+
+
+class Histogram:
+    """
+    Prometheus-style histogram with fixed buckets, one series per label tuple.
+
+    observe() is a bisect plus three additions under a lock, cheap enough to
+    leave on in production.
+    """
+
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._series = {}  # label values -> [bucket counts, sum, count]
+
+    def observe(self, value, *label_values):
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][bisect.bisect_left(self.buckets, value)] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, *label_values):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *label_values)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            series = {k: (list(v[0]), v[1], v[2]) for k, v in self._series.items()}
+        for label_values, (counts, total, count) in sorted(series.items()):
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float('inf'),), counts):
+                cumulative += n
+                le = '+Inf' if bound == float('inf') else f'{bound:g}'
+                lines.append(f'{self.name}_bucket{_format_labels(self.labels, label_values, [("le", le)])} {cumulative}')
+            label_text = _format_labels(self.labels, label_values)
+            lines.append(f'{self.name}_sum{label_text} {total:.9g}')
+            lines.append(f'{self.name}_count{label_text} {count}')
+        return lines
+
+
+class Counter:
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} counter']
+        with self._lock:
+            values = dict(self._values)
+        for label_values, value in sorted(values.items()):
+            lines.append(f'{self.name}{_format_labels(self.labels, label_values)} {value:.9g}')
+        return lines
+
+
+class Gauge:
+    """Value read at scrape time from a callable, e.g. the trade store cursor."""
+
+    def __init__(self, name, help_text, read_fn):
+        self.name = name
+        self.help_text = help_text
+        self.read_fn = read_fn
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} gauge']
+        try:
+            value = self.read_fn()
+        except Exception:
+            return lines
+        if value is not None:
+            lines.append(f'{self.name} {float(value):.9g}')
+        return lines
+
+
+class MetricsRegistry:
+    """Named metrics rendered together in the Prometheus text exposition format."""
+
+    content_type = 'text/plain; version=0.0.4; charset=utf-8'
+
+    def __init__(self):
+        self._metrics = {}
+
+    def _register(self, metric):
+        return self._metrics.setdefault(metric.name, metric)
+
+    def histogram(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, help_text, labels, buckets))
+
+    def counter(self, name, help_text, labels=()):
+        return self._register(Counter(name, help_text, labels))
+
+    def gauge(self, name, help_text, read_fn):
+        return self._register(Gauge(name, help_text, read_fn))
+
+    def render(self):
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+class ProfilerToggle:
+    """
+    On-demand cProfile for diagnosing a slow period in production.
+
+    cProfile only sees the thread that enabled it, so work to be profiled runs
+    between begin() and end() (or inside sample()); each call gets its own
+    Profile and stop() merges them. Costs nothing while off.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._profiles = None
+        self.started_at = None
+
+    @property
+    def active(self):
+        return self._profiles is not None
+
+    def start(self):
+        with self._lock:
+            if self._profiles is None:
+                self._profiles = []
+                self.started_at = time.time()
+            return self.started_at
+
+    def begin(self):
+        """Start a per-thread Profile while profiling is on; pass the result to end()."""
+        if self._profiles is None:
+            return None
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Python 3.12+ allows one active profiler per process; this call goes unsampled
+            return None
+        return profile
+
+    def end(self, profile):
+        if profile is None:
+            return
+        profile.disable()
+        with self._lock:
+            if self._profiles is not None:
+                self._profiles.append(profile)
+
+    @contextmanager
+    def sample(self):
+        profile = self.begin()
+        try:
+            yield
+        finally:
+            self.end(profile)
+
+    def stop(self, sort='cumulative', limit=40):
+        """Stop profiling and return the top functions as pstats text ('' if nothing was sampled)."""
+        with self._lock:
+            profiles, self._profiles = self._profiles, None
+        if not profiles:
+            return ''
+        out = io.StringIO()
+        pstats.Stats(*profiles, stream=out).sort_stats(sort).print_stats(limit)
+        return out.getvalue()
@@ -0,0 +1,50 @@
+import hashlib
+import json
+import threading
+import time
+from datetime import datetime
+
+
+class RiskSnapshotCache:
+    """
+    All PnL/exposure figures computed in one pass and cached for a short TTL.
+
+    Concurrent readers share a single computation. The version only moves when
+    the figures actually change, so its ETag lets unchanged snapshots return 304.
+    Figures are tagged with generation_fn() (the options book generation) read
+    before computing, so a snapshot of a replaced book is never served.
+    """
+
+    def __init__(self, compute_fn, ttl=1.0, generation_fn=None):
+        self.compute_fn = compute_fn
+        self.ttl = ttl
+        self.generation_fn = generation_fn or (lambda: 0)
+        self._lock = threading.Lock()
+        self._expires_at = 0.0
+        self._generation = None
+        self.figures = None
+        self.version = 0
+        self.etag = None
+        self.computed_at = None
+
+    def invalidate(self):
+        """Force the next read to recompute, e.g. after a fill or a hedge push."""
+        self._expires_at = 0.0
+
+    def get(self):
+        """Returns (figures, version, etag, computed_at), recomputing if the cache is stale."""
+        with self._lock:
+            generation = self.generation_fn()
+            if (self.figures is None or time.monotonic() >= self._expires_at
+                    or generation != self._generation):
+                # Read before computing: a swap mid-computation only costs a recompute
+                figures = self.compute_fn()
+                self._generation = generation
+                self.computed_at = datetime.now().isoformat()
+                self._expires_at = time.monotonic() + self.ttl
+                if figures != self.figures:
+                    self.figures = figures
+                    self.version += 1
+                    digest = hashlib.sha1(json.dumps(figures, sort_keys=True).encode()).hexdigest()
+                    self.etag = f'{self.version}-{digest[:12]}'
+            return self.figures, self.version, self.etag, self.computed_at
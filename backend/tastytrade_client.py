@@ -0,0 +1,83 @@
+import json
+import threading
+import time
+from datetime import datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class TastytradeClient:
+    """
+    Tastytrade REST client that keeps one login and one keep-alive connection pool.
+
+    The session token is cached until shortly before it expires and refreshed
+    transparently when the API answers 401.
+    """
+
+    SESSION_TTL = 24 * 60 * 60  # used when the login response has no expiration
+    EXPIRY_MARGIN = 60
+
+    def __init__(self, user, pw, base_url='https://api.tastyworks.com', pool_size=4):
+        self.user = user
+        self.pw = pw
+        self.base_url = base_url
+        self.http = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.http.mount('https://', adapter)
+        self.http.headers.update({'Content-Type': 'application/json'})
+        self._lock = threading.Lock()
+        self._token = None
+        self._expires_at = 0.0
+
+    def login(self):
+        data = {
+            "login": self.user,
+            "password": self.pw,
+            "remember-me": True
+        }
+        response = self.http.post(f'{self.base_url}/sessions', data=json.dumps(data))
+        response.raise_for_status()
+        session_data = response.json()['data']
+        self._token = session_data['session-token']
+        expiration = session_data.get('session-expiration')
+        if expiration:
+            self._expires_at = datetime.fromisoformat(expiration.replace('Z', '+00:00')).timestamp()
+        else:
+            self._expires_at = time.time() + self.SESSION_TTL
+        return self._token
+
+    def token(self):
+        """Cached session token, logging in again only when it is missing or about to expire."""
+        with self._lock:
+            if self._token is None or time.time() >= self._expires_at - self.EXPIRY_MARGIN:
+                self.login()
+            return self._token
+
+    def invalidate(self, token):
+        with self._lock:
+            if self._token == token:
+                self._token = None
+
+    def request(self, method, path, **kwargs):
+        token = self.token()
+        response = self.http.request(method, f'{self.base_url}{path}', headers={'Authorization': token}, **kwargs)
+        if response.status_code == 401:
+            # Session was revoked or expired early, log in once more and retry
+            self.invalidate(token)
+            response = self.http.request(method, f'{self.base_url}{path}', headers={'Authorization': self.token()}, **kwargs)
+        response.raise_for_status()
+        return response
+
+    def get(self, path, **kwargs):
+        return self.request('GET', path, **kwargs)
+
+    def close(self):
+        """Delete the session on the server and release pooled connections."""
+        with self._lock:
+            token, self._token = self._token, None
+        try:
+            if token is not None:
+                self.http.delete(f'{self.base_url}/sessions', headers={'Authorization': token})
+        finally:
+            self.http.close()
@@ -0,0 +1,81 @@
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+
+class TradeSource(ABC):
+    """
+    Common interface for a broker feeding the blotter.
+
+    Subclasses set `name` (used as the 'source' column) and implement fetch(),
+    returning a DataFrame already renamed to the blotter's column names.
+    """
+
+    name = None
+    timeout = 15.0
+
+    @abstractmethod
+    def fetch(self):
+        """Return this broker's trades as a DataFrame."""
+
+
+class TradeFanOut:
+    """Query every TradeSource concurrently, each bounded by its own timeout."""
+
+    def __init__(self, sources, max_workers=None):
+        self.sources = list(sources)
+        self.max_workers = max_workers
+        self.executor = self._new_executor()
+        self._running = {}
+
+    def _new_executor(self):
+        # One worker per source, so no source waits on a free worker past its timeout
+        self.workers = max(self.max_workers or 0, len(self.sources), 1)
+        return ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='trade-source')
+
+    def add_source(self, source):
+        self.sources.append(source)
+        if len(self.sources) > self.workers:
+            # Calls already running finish on the old pool; their futures stay in _running
+            old, self.executor = self.executor, self._new_executor()
+            old.shutdown(wait=False)
+
+    def fetch(self):
+        """
+        Returns (DataFrame, errors) where errors maps a source name to the reason it
+        is missing from this round. Sources that fail or time out do not hold up the
+        others. A source whose previous call is still running is not called again;
+        that call's result is collected when it finishes, so a source slower than
+        its timeout still delivers in a later round.
+        """
+        started = time.monotonic()
+        for source in self.sources:
+            if source.name not in self._running:
+                self._running[source.name] = self.executor.submit(source.fetch)
+
+        frames, errors = [], {}
+        for source in self.sources:
+            future = self._running[source.name]
+            remaining = max(0.0, started + source.timeout - time.monotonic())
+            try:
+                df = future.result(timeout=remaining)
+            except TimeoutError:
+                # Left in _running: read next round instead of being replaced
+                errors[source.name] = f"timed out after {source.timeout:g}s"
+                continue
+            except Exception as e:
+                del self._running[source.name]
+                errors[source.name] = str(e)
+                continue
+            del self._running[source.name]
+            if df is not None and not df.empty:
+                df['source'] = source.name
+                # Nullable ints, so concat does not upcast ids to float where another source has NaN
+                ints = df.select_dtypes('integer').columns
+                frames.append(df.astype({column: 'Int64' for column in ints}))
+
+        # pandas is imported here so the backend can import this module before its warm-up
+        import pandas as pd
+        if not frames:
+            return pd.DataFrame(), errors
+        return pd.concat(frames, ignore_index=True), errors
@@ -0,0 +1,111 @@
+import json
+import sqlite3
+import threading
+
+import numpy as np
+import pandas as pd
+
+
+class TradeStore:
+    """
+    Local SQLite cache of blotter rows keyed by broker trade id.
+
+    Every upsert that inserts or changes rows stamps them with a new sequence
+    number, so clients can ask for everything newer than the cursor they hold.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS trades (
+                trade_key TEXT PRIMARY KEY,
+                source TEXT NOT NULL,
+                executed_at TEXT,
+                payload TEXT NOT NULL,
+                seq INTEGER NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS trades_seq ON trades (seq)")
+        self._conn.commit()
+        self.cursor = self._conn.execute("SELECT COALESCE(MAX(seq), 0) FROM trades").fetchone()[0]
+
+    @staticmethod
+    def trade_keys(df):
+        """Tastytrade rows carry 'id', IBKR rows carry 'exec-id'; NaN where a row has neither."""
+        trade_id = pd.Series(np.nan, index=df.index, dtype=object)
+        if 'id' in df:
+            ids = df['id']
+            if pd.api.types.is_float_dtype(ids):
+                # concat with IBKR rows upcasts Tastytrade ids to float
+                ids = ids.astype('Int64')
+            trade_id = ids.astype(object).where(ids.notna(), np.nan)
+        if 'exec-id' in df:
+            trade_id = trade_id.where(trade_id.notna(), df['exec-id'])
+        return (df['source'].astype(str) + ':' + trade_id.astype(str)).where(trade_id.notna())
+
+    def upsert(self, df):
+        """Insert new rows of a blotter DataFrame and update changed ones; returns how many rows changed."""
+        if df.empty:
+            return 0
+        # Stable column order so unchanged rows serialize to identical payloads;
+        # to_json writes NaN as null, inf is mapped to NaN first
+        df = df[sorted(df.columns)].replace([np.inf, -np.inf], np.nan).reset_index(drop=True)
+        keys = self.trade_keys(df)
+        # Nulls are dropped per row, so a payload depends only on its own row, not on
+        # which other rows or brokers share the batch
+        nulls = df.isna().to_numpy()
+        patterns = pd.Series(map(bytes, np.packbits(nulls, axis=1)), index=df.index)
+        payloads = np.empty(len(df), dtype=object)
+        for rows in patterns.groupby(patterns, sort=False).indices.values():
+            # Rows with the same null columns serialize together, without those columns
+            group = df.iloc[rows, ~nulls[rows[0]]]
+            payloads[rows] = group.to_json(orient='records', lines=True, date_format='iso').rstrip('\n').split('\n')
+        executed_at = df['executed-at'] if 'executed-at' in df else pd.Series(None, index=df.index)
+        rows = [
+            row for row in zip(keys, df['source'], executed_at.where(executed_at.notna(), None), payloads)
+            if isinstance(row[0], str)
+        ]
+        if not rows:
+            return 0
+
+        with self._lock:
+            seq = self.cursor + 1
+            before = self._conn.total_changes
+            self._conn.executemany("""
+                INSERT INTO trades (trade_key, source, executed_at, payload, seq)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(trade_key) DO UPDATE SET
+                    executed_at = excluded.executed_at,
+                    payload = excluded.payload,
+                    seq = excluded.seq
+                WHERE trades.payload != excluded.payload
+            """, [row + (seq,) for row in rows])
+            self._conn.commit()
+            changed = self._conn.total_changes - before
+            if changed:
+                self.cursor = seq
+            return changed
+
+    def since(self, cursor=0):
+        """(cursor, JSON array text) of rows changed after cursor, newest execution first."""
+        with self._lock:
+            payloads = self._conn.execute(
+                "SELECT payload FROM trades WHERE seq > ? ORDER BY executed_at DESC",
+                (cursor,)
+            ).fetchall()
+            return self.cursor, '[' + ','.join(p for (p,) in payloads) + ']'
+
+    def fills_since(self, cursor):
+        """(cursor, [(trade_key, row dict)]) for rows inserted or changed after cursor."""
+        with self._lock:
+            rows = self._conn.execute("SELECT trade_key, payload FROM trades WHERE seq > ?", (cursor,)).fetchall()
+            return self.cursor, [(key, json.loads(payload)) for key, payload in rows]
+
+    def latest_executed_at(self, source):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT MAX(executed_at) FROM trades WHERE source = ?", (source,)
+            ).fetchone()[0]
@@ -0,0 +1,81 @@
+import threading
+import time
+
+
+class Warmup:
+    """
+    Named start-up steps run in order on one background thread.
+
+    Flask starts serving before the heavy imports and broker clients are ready;
+    routes wait() on the steps they depend on and /health reports progress.
+    A failed step is recorded and the remaining steps still run.
+    """
+
+    def __init__(self):
+        self._steps = []
+        self._state = {}
+        self._done = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self.started_at = None
+        self.finished_at = None
+
+    def add(self, name, fn, required=True):
+        """Required steps must succeed before the backend reports ready."""
+        self._steps.append((name, fn, required))
+        self._state[name] = {"state": "pending", "required": required, "seconds": None, "error": None}
+        self._done[name] = threading.Event()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self.started_at = time.monotonic()
+                self._thread = threading.Thread(target=self._run, name='warmup', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        for name, fn, _ in self._steps:
+            state = self._state[name]
+            state["state"] = "running"
+            started = time.monotonic()
+            try:
+                fn()
+                state["state"] = "done"
+            except Exception as e:
+                state["state"] = "failed"
+                state["error"] = str(e)
+                print(f"Error (warm-up {name}): {e}")
+            finally:
+                state["seconds"] = round(time.monotonic() - started, 3)
+                self._done[name].set()
+        self.finished_at = time.monotonic()
+        print(f"Warm-up finished in {self.finished_at - self.started_at:.2f}s")
+
+    def wait(self, name, timeout=None):
+        """True once the step has succeeded; False if it failed or is still running after timeout."""
+        self.start()
+        return self._done[name].wait(timeout) and self._state[name]["state"] == "done"
+
+    def succeeded(self, name):
+        return self._state[name]["state"] == "done"
+
+    @property
+    def ready(self):
+        return all(s["state"] == "done" for s in self._state.values() if s["required"])
+
+    def status(self):
+        finished = self.finished_at is not None
+        if self.ready:
+            status = "degraded" if finished and any(s["state"] == "failed" for s in self._state.values()) else "ready"
+        else:
+            failed = any(s["state"] == "failed" and s["required"] for s in self._state.values())
+            status = "failed" if failed else "starting"
+        elapsed = None
+        if self.started_at is not None:
+            elapsed = round((self.finished_at or time.monotonic()) - self.started_at, 3)
+        return {
+            "status": status,
+            "ready": self.ready,
+            "elapsed": elapsed,
+            "steps": {name: dict(state) for name, state in self._state.items()},
+        }
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Blotter and risk endpoint benchmark: the Flask app with mocked brokers and a synthetic option book.
+
+    python benchmarks/bench_backend.py --rows 50000 --contracts 2000
+"""
+
+import argparse
+import math
+import os
+import sys
+import tempfile
+import time
+import types
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from common import latency_stats, peak_rss_mb, time_calls, use_repo_modules, write_result
+
+use_repo_modules()
+from greeks import OptionBook  # noqa: E402
+from quote_store import QuoteStore  # noqa: E402
+
+
+def tastytrade_items(rows: int, rng) -> list:
+    """Transactions as the Tastytrade API returns them (data.items), every row a 'Trade'."""
+    start = datetime(2025, 1, 2, 14, 30)
+    return [{
+        'id': 100000000 + i,
+        'account-number': '5WY49300',
+        'transaction-type': 'Trade',
+        'transaction-sub-type': 'Buy to Open' if i % 2 else 'Sell to Close',
+        'symbol': f'SYM{i % 500:03d}',
+        'instrument-type': 'Equity',
+        'underlying-symbol': f'SYM{i % 500:03d}',
+        'action': 'Buy to Open' if i % 2 else 'Sell to Close',
+        'quantity': str(int(rng.integers(1, 500))),
+        'price': f'{rng.uniform(5, 500):.2f}',
+        'value': f'{rng.uniform(-50000, 50000):.2f}',
+        'commission': '0.0',
+        'executed-at': (start + timedelta(seconds=37 * i)).strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + '+00:00',
+        'description': 'Bought to open',
+    } for i in range(rows)]
+
+
+def ibkr_frame(rows: int, rng) -> pd.DataFrame:
+    """Executions shaped like ibkr_transactions.ib_transactions() output."""
+    start = datetime(2025, 1, 2, 8, 30)
+    times = [start + timedelta(seconds=41 * i) for i in range(rows)]
+    return pd.DataFrame({
+        'Account': 'U1234567',
+        'Symbol': [f'SYM{i % 500:03d}' for i in range(rows)],
+        'SecType': 'STK',
+        'Currency_x': 'USD',
+        'Currency_y': 'USD',
+        'Action': np.where(np.arange(rows) % 2, 'BOT', 'SLD'),
+        'Quantity': rng.integers(1, 500, rows).astype(float),
+        'Price': rng.uniform(5, 500, rows).round(2),
+        'Time': [t.strftime('%Y%m%d  %H:%M:%S') for t in times],
+        'ExecId': [f'0000e0d5.{i:08x}.01.01' for i in range(rows)],
+        'OrderId': rng.integers(1, 10**6, rows),
+        'Exchange': 'SMART',
+        'Liquidation': 0,
+        'Commission': rng.uniform(0.35, 2.0, rows).round(4),
+    })
+
+
+class SyntheticOptions:
+    """
+    OptionsClass stand-in backed by a greeks.OptionBook.
+
+    Each figure call marks the book to a fresh random tick first, like the live
+    class pulling prices, so uncached endpoint latency includes a revaluation.
+    """
+
+    contracts = 2000
+    underlyings = 50
+
+    def __init__(self):
+        self.rng = np.random.default_rng(11)
+        n, u = self.contracts, self.underlyings
+        names = [f'U{i:03d}' for i in range(u)]
+        underlying = self.rng.integers(0, u, n)
+        self.base_spots = self.rng.uniform(50, 500, u)
+        strikes = (self.base_spots[underlying] * self.rng.uniform(0.8, 1.2, n)).round()
+        expiries = np.datetime64('today', 'D') + self.rng.integers(7, 180, n)
+        self.book = OptionBook([f'.{names[k]}C{i}' for i, k in enumerate(underlying)],
+                               [names[k] for k in underlying], strikes, expiries, self.rng.random(n) < 0.5,
+                               self.rng.integers(-20, 20, n), self.rng.uniform(0.15, 0.6, n))
+        # book.spots is aligned with book.underlying_names
+        self.names = self.book.underlying_names
+        self.book.update_spots(dict(zip(names, self.base_spots)))
+        self.cost = self.book.position_greeks()['value'].copy()
+        self.hedge_shares = np.zeros(len(self.names))
+        self.hedge_price = self._spots()
+        # Underlying quotes; HedgerEngine hands quote_store to the hedge pipeline for tick_to_order_ms
+        self.quote_store = QuoteStore(list(self.names))
+
+    def _mark(self):
+        moves = self.book.spots * (1 + self.rng.normal(0, 1e-4, len(self.names)))
+        self.book.update_spots(dict(zip(self.names, moves)))
+        quotes = np.column_stack([moves * 0.9999, moves * 1.0001, np.full((len(moves), 2), 100.0)])
+        self.quote_store.update_many(list(self.names), quotes)
+
+    def _spots(self):
+        return self.book.spots.copy()
+
+    def get_option_pnl_tos(self):
+        self._mark()
+        return float(np.nansum(self.book.position_greeks()['value'] - self.cost))
+
+    def get_hedge_pnl_tos(self):
+        self._mark()
+        return float(np.sum(self.hedge_shares * (self._spots() - self.hedge_price)))
+
+    def get_total_pnl_tos(self):
+        return self.get_option_pnl_tos() + self.get_hedge_pnl_tos()
+
+    def get_opt_exposure(self):
+        self._mark()
+        deltas = self.book.net_delta_by_underlying()
+        return float(sum(deltas[name] * spot for name, spot in zip(self.names, self._spots())))
+
+    def get_total_exposure(self):
+        return self.get_opt_exposure() + float(np.sum(self.hedge_shares * self._spots()))
+
+    def hedge_orders(self):
+        deltas = self.book.net_delta_by_underlying()
+        return [{'symbol': name, 'quantity': float(-round(deltas[name])), 'price': float(spot)}
+                for name, spot in zip(self.names, self._spots()) if round(deltas[name])]
+
+    def send_hedge_orders(self, orders):
+        # Filled on the spot; the broker round-trip is not simulated
+        index = {name: i for i, name in enumerate(self.names)}
+        for order in orders:
+            self.hedge_shares[index[order['symbol']]] += order['quantity']
+        self.hedge_price = self._spots()
+        return orders
+
+
+class FakeResponse:
+    def __init__(self, payload):
+        self.payload = payload
+
+    def json(self):
+        return self.payload
+
+
+def sanitize_data(data):
+    """The per-value NaN/inf pass /trades ran before payloads were encoded once in the trade store, for comparison."""
+    if isinstance(data, float):
+        if math.isnan(data) or math.isinf(data):
+            return None
+    elif isinstance(data, dict):
+        return {k: sanitize_data(v) for k, v in data.items()}
+    elif isinstance(data, list):
+        return [sanitize_data(v) for v in data]
+    return data
+
+
+def load_backend(workdir: str, rows: int, contracts: int):
+    """Import backend.py against mocked brokers, a throwaway trade store and the synthetic book."""
+    rng = np.random.default_rng(3)
+    tasty_payload = {'data': {'items': tastytrade_items(rows // 2, rng)}}
+    ib_df = ibkr_frame(rows - rows // 2, rng)
+
+    sys.modules['ibkr_transactions'] = types.SimpleNamespace(ib_transactions=lambda: ib_df.copy())
+    SyntheticOptions.contracts = contracts
+    sys.modules['options'] = types.SimpleNamespace(OptionsClass=SyntheticOptions)
+
+    creds_file = os.path.join(workdir, 'creds.yaml')
+    with open(creds_file, 'w') as f:
+        f.write('user: [bench]\npw: [bench]\n')
+    os.environ['TCN_CREDS_FILE'] = creds_file
+    os.environ['TCN_TRADE_DB'] = os.path.join(workdir, 'trades.db')
+
+    # Broker clients are built by the backend's warm-up thread, so patch the classes up front
+    import ibkr_connection
+    import tastytrade_client
+    import trade_sources
+    tastytrade_client.TastytradeClient.get = lambda self, path, params=None, **kwargs: FakeResponse(tasty_payload)
+    ibkr_connection.IBKRConnectionManager.cleanup_hung_sessions = lambda self: []
+    trade_sources.TradeSource.timeout = 120.0
+
+    import backend
+    # Refreshes are driven by the benchmark, not by the background thread
+    backend.start_trade_refresher = lambda: None
+    return backend
+
+
+def run(rows: int = 50000, contracts: int = 2000, repeat: int = 50) -> dict:
+    with tempfile.TemporaryDirectory() as workdir:
+        backend = load_backend(workdir, rows, contracts)
+        client = backend.app.test_client()
+        endpoints = {}
+
+        # Warm-up (imports, trade store, first broker fetch) runs on the first request
+        started = time.perf_counter()
+        client.get('/health')
+        endpoints['health_first'] = latency_stats([time.perf_counter() - started])
+        response = client.get('/trades')
+        endpoints['trades_cold'] = latency_stats([time.perf_counter() - started])
+        trades = response.get_json()
+        endpoints['trades_full'] = time_calls(lambda: client.get('/trades'), max(repeat // 5, 1))
+        cursor = backend.trade_store.cursor
+        endpoints['trades_since'] = time_calls(lambda: client.get(f'/trades?since={cursor}'), repeat)
+
+        started = time.perf_counter()
+        backend.refresh_trades()
+        refresh_unchanged = time.perf_counter() - started
+        started = time.perf_counter()
+        sanitize_data(trades)
+        sanitize = time.perf_counter() - started
+
+        started = time.perf_counter()
+        client.get('/option/init')
+        endpoints['option_init'] = latency_stats([time.perf_counter() - started])
+        endpoints['snapshot_cached'] = time_calls(lambda: client.get('/option/snapshot'), repeat)
+
+        def uncached_snapshot():
+            backend.risk_cache.invalidate()
+            client.get('/option/snapshot')
+        endpoints['snapshot_uncached'] = time_calls(uncached_snapshot, repeat)
+        for figure in backend.RISK_FIGURES:
+            def uncached_figure(figure=figure):
+                backend.risk_cache.invalidate()
+                client.get(f'/option/{figure}')
+            endpoints[figure] = time_calls(uncached_figure, repeat)
+
+        keys = iter(range(10**9))
+
+        def push_hedge():
+            # No fills reach the store here, so forget the working orders to time a full send each call
+            backend.hedge_pipeline.reset()
+            client.post('/option/push_hedge_trades', json={'threshold': 1e-6},
+                        headers={'Idempotency-Key': f'bench-{next(keys)}'})
+        endpoints['push_hedge_trades'] = time_calls(push_hedge, repeat)
+
+        return {
+            'benchmark': 'backend',
+            'params': {'rows': rows, 'contracts': contracts, 'repeat': repeat},
+            'blotter_rows': len(trades),
+            'refresh_unchanged_ms': refresh_unchanged * 1000,
+            'sanitize_data_ms': sanitize * 1000,
+            'endpoint_latency': endpoints,
+            'peak_rss_mb': peak_rss_mb(),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=50000, help='blotter rows, split between both brokers')
+    parser.add_argument('--contracts', type=int, default=2000, help='positions in the synthetic option book')
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--output', help='write the result JSON here')
+    args = parser.parse_args()
+    write_result(run(args.rows, args.contracts, args.repeat), args.output)
+
+
+if __name__ == '__main__':
+    main()
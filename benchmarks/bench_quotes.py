@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Quote ingest benchmark: MarketDataWebSocket against the local fake dxFeed server.
+
+    python benchmarks/bench_quotes.py --symbols 2000 --ticks 200000 --batch 200
+"""
+
+import argparse
+import time
+
+from common import latency_stats, peak_rss_mb, use_repo_modules, write_result
+from fake_dxfeed import FakeDxFeedServer
+
+use_repo_modules()
+from market_data_processor import MarketDataProcessor  # noqa: E402
+from prev_close import StaticPreviousCloseProvider  # noqa: E402
+
+
+def run(symbols: int = 2000, ticks: int = 200000, batch: int = 200, rate: float = None,
+        timeout: float = 300.0) -> dict:
+    names = [f'SYM{i:05d}' for i in range(symbols)]
+    server = FakeDxFeedServer(ticks, batch_size=batch, ticks_per_second=rate).start()
+    # The ring buffer keeps every tick so per-tick latency can be read back afterwards
+    processor = MarketDataProcessor('bench-token', names, history_size=ticks,
+                                    prev_close_provider=StaticPreviousCloseProvider({s: 100.0 for s in names}))
+    client = processor.ws_client
+    client.ws_url = server.url
+    client.set_symbols_to_track(names)
+    client.start()
+    try:
+        deadline = time.monotonic() + timeout
+        while int(client.quote_store.update_count.sum()) < ticks and time.monotonic() < deadline:
+            time.sleep(0.05)
+        received = int(client.quote_store.update_count.sum())
+    finally:
+        client.stop()
+        server.stop()
+
+    _, values, received_at = client.quote_store.history()
+    sent_at = values[:, 2]  # the fake server stamps its send time into bidSize
+    wall = received_at.max() - received_at.min() if len(received_at) > 1 else float('nan')
+
+    # Cost of turning the store into the enriched DataFrame callers read
+    snapshot_samples = []
+    for _ in range(50):
+        started = time.perf_counter()
+        processor.get_latest_prices()
+        snapshot_samples.append(time.perf_counter() - started)
+
+    return {
+        'benchmark': 'quotes',
+        'params': {'symbols': symbols, 'ticks': ticks, 'batch': batch, 'rate': rate},
+        'received_ticks': received,
+        'ticks_per_sec': float(len(received_at) / wall) if wall > 0 else None,
+        'tick_to_store_latency': latency_stats(received_at - sent_at),
+        'snapshot_latency': latency_stats(snapshot_samples),
+        'all_symbols_seen': client.all_received.is_set(),
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--symbols', type=int, default=2000)
+    parser.add_argument('--ticks', type=int, default=200000)
+    parser.add_argument('--batch', type=int, default=200, help='quotes per FEED_DATA message')
+    parser.add_argument('--rate', type=float, default=None, help='ticks/sec to send (default: unthrottled)')
+    parser.add_argument('--output', help='write the result JSON here')
+    args = parser.parse_args()
+    write_result(run(args.symbols, args.ticks, args.batch, args.rate), args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+
+import json
+import os
+import resource
+import sys
+import time
+from typing import Callable, Dict
+
+import numpy as np
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKEND_DIR = os.path.join(REPO_DIR, 'backend')
+
+
+def use_repo_modules():
+    """Make the flat root and backend modules importable the same way the app imports them."""
+    for path in (REPO_DIR, BACKEND_DIR):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process (ru_maxrss is KiB on Linux, bytes on macOS)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def latency_stats(samples_seconds) -> Dict[str, float]:
+    """count, mean, p50, p99 and max of latency samples, reported in milliseconds."""
+    ms = np.asarray(samples_seconds, dtype=np.float64) * 1000
+    if not len(ms):
+        return {'count': 0}
+    return {
+        'count': int(len(ms)),
+        'mean_ms': float(ms.mean()),
+        'p50_ms': float(np.percentile(ms, 50)),
+        'p99_ms': float(np.percentile(ms, 99)),
+        'max_ms': float(ms.max()),
+    }
+
+
+def time_calls(fn: Callable, repeat: int) -> Dict[str, float]:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return latency_stats(samples)
+
+
+def write_result(result: dict, path: str = None):
+    """Print the result and, when path is given, save it as JSON for run.py."""
+    text = json.dumps(result, indent=2)
+    print(text)
+    if path:
+        with open(path, 'w') as f:
+            f.write(text)
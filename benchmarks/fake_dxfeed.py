@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+
+import asyncio
+import json
+import threading
+import time
+
+import numpy as np
+import websockets
+
+# Used when the client's FEED_SETUP does not list Quote fields
+DEFAULT_QUOTE_FIELDS = ["eventType", "eventSymbol", "bidPrice", "askPrice", "bidSize", "askSize"]
+
+
+class FakeDxFeedServer:
+    """
+    Local stand-in for the dxFeed websocket, speaking the handshake that
+    MarketDataWebSocket.on_message expects: SETUP, AUTH_STATE, CHANNEL_OPENED,
+    FEED_CONFIG, then COMPACT Quote FEED_DATA for every subscribed symbol in
+    the field order the client asked for.
+
+    Quotes are a random walk per symbol. bidSize carries the server's
+    time.time() at send, so the client can measure tick-to-store latency
+    against the receive timestamp QuoteStore records. Sends batch_size quotes
+    per message, paced to ticks_per_second (None sends as fast as possible),
+    and stops after total_ticks.
+    """
+
+    def __init__(self, total_ticks: int, batch_size: int = 100, ticks_per_second: float = None,
+                 host: str = '127.0.0.1', port: int = 0, seed: int = 7):
+        self.total_ticks = total_ticks
+        self.batch_size = batch_size
+        self.ticks_per_second = ticks_per_second
+        self.host = host
+        self.port = port
+        self.rng = np.random.default_rng(seed)
+        self.sent_ticks = 0
+        self.done = threading.Event()
+        self._loop = None
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        return f'ws://{self.host}:{self.port}'
+
+    def start(self) -> 'FakeDxFeedServer':
+        started = threading.Event()
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            self._server = self._loop.run_until_complete(
+                websockets.serve(self.handler, self.host, self.port, max_size=None))
+            self.port = self._server.sockets[0].getsockname()[1]
+            started.set()
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=run, name='fake-dxfeed', daemon=True)
+        self._thread.start()
+        started.wait()
+        return self
+
+    def stop(self):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._server.close)
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(5)
+
+    async def handler(self, ws, path=None):
+        symbols = []
+        fields = DEFAULT_QUOTE_FIELDS
+        channel = None
+        streaming = None
+        try:
+            async for message in ws:
+                data = json.loads(message)
+                kind = data.get('type')
+                if kind == 'SETUP':
+                    await ws.send(json.dumps({"type": "SETUP", "channel": 0, "version": "fake-dxfeed",
+                                              "keepaliveTimeout": 60, "acceptKeepaliveTimeout": 60}))
+                    await ws.send(json.dumps({"type": "AUTH_STATE", "channel": 0, "state": "UNAUTHORIZED"}))
+                elif kind == 'AUTH':
+                    await ws.send(json.dumps({"type": "AUTH_STATE", "channel": 0, "state": "AUTHORIZED"}))
+                elif kind == 'CHANNEL_REQUEST':
+                    channel = data['channel']
+                    await ws.send(json.dumps({"type": "CHANNEL_OPENED", "channel": channel, "service": "FEED",
+                                              "parameters": data.get('parameters', {})}))
+                elif kind == 'FEED_SETUP':
+                    fields = data.get('acceptEventFields', {}).get('Quote', DEFAULT_QUOTE_FIELDS)
+                    await ws.send(json.dumps({"type": "FEED_CONFIG", "channel": channel, "dataFormat": "COMPACT",
+                                              "aggregationPeriod": 0.1, "eventFields": {"Quote": fields}}))
+                elif kind == 'FEED_SUBSCRIPTION':
+                    if data.get('reset'):
+                        symbols.clear()
+                    removed = {item['symbol'] for item in data.get('remove', [])}
+                    symbols[:] = [s for s in symbols if s not in removed]
+                    symbols.extend(item['symbol'] for item in data.get('add', []) if item['symbol'] not in symbols)
+                    if streaming is None and symbols:
+                        streaming = asyncio.ensure_future(self.stream(ws, channel, symbols, fields))
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            if streaming is not None:
+                streaming.cancel()
+
+    async def stream(self, ws, channel, symbols, fields):
+        mids = 100 + self.rng.random(len(symbols)) * 400
+        position = 0
+        started = time.perf_counter()
+        while self.sent_ticks < self.total_ticks:
+            n = min(self.batch_size, self.total_ticks - self.sent_ticks)
+            idx = (position + np.arange(n)) % len(symbols)
+            position = (position + n) % len(symbols)
+            if len(mids) < len(symbols):
+                mids = np.concatenate([mids, 100 + self.rng.random(len(symbols) - len(mids)) * 400])
+            mids[idx] *= 1 + self.rng.normal(0, 1e-4, n)
+            half_spread = mids[idx] * 5e-5
+            compact = []
+            sent_at = time.time()
+            for i, mid, half in zip(idx.tolist(), mids[idx].tolist(), half_spread.tolist()):
+                event = {"eventType": "Quote", "eventSymbol": symbols[i], "bidPrice": round(mid - half, 4),
+                         "askPrice": round(mid + half, 4), "bidSize": sent_at, "askSize": 100,
+                         "bidTime": int(sent_at * 1000), "askTime": int(sent_at * 1000)}
+                compact += [event.get(field, 0) for field in fields]
+            await ws.send(json.dumps({"type": "FEED_DATA", "channel": channel, "data": ["Quote", compact]}))
+            self.sent_ticks += n
+            if self.ticks_per_second:
+                delay = self.sent_ticks / self.ticks_per_second - (time.perf_counter() - started)
+                await asyncio.sleep(max(delay, 0))
+            else:
+                await asyncio.sleep(0)
+        self.done.set()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Run every benchmark in its own process and save the combined results.
+
+    python benchmarks/run.py                              # results/<timestamp>-<commit>.json
+    python benchmarks/run.py --baseline results/old.json  # also print the change per metric
+    python benchmarks/run.py --only backend --quick
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_DIR = os.path.join(BENCH_DIR, 'results')
+
+SUITES = {
+    'quotes': ('bench_quotes.py', [], ['--ticks', '20000', '--symbols', '500']),
+    'backend': ('bench_backend.py', [], ['--rows', '5000', '--repeat', '10']),
+}
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=BENCH_DIR,
+                                       text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def run_suite(name: str, quick: bool) -> dict:
+    # A fresh interpreter per suite, so peak RSS belongs to that suite alone
+    script, args, quick_args = SUITES[name]
+    with tempfile.TemporaryDirectory() as workdir:
+        output = os.path.join(workdir, 'result.json')
+        command = [sys.executable, os.path.join(BENCH_DIR, script), '--output', output]
+        command += quick_args if quick else args
+        completed = subprocess.run(command, cwd=BENCH_DIR, stdout=subprocess.DEVNULL)
+        if completed.returncode != 0 or not os.path.exists(output):
+            return {'benchmark': name, 'error': f'exit code {completed.returncode}'}
+        with open(output) as f:
+            return json.load(f)
+
+
+def flatten(result, prefix=''):
+    """{'a': {'b': 1}} -> {'a.b': 1}, numeric leaves only."""
+    flat = {}
+    for key, value in result.items():
+        path = f'{prefix}{key}'
+        if isinstance(value, dict):
+            flat.update(flatten(value, f'{path}.'))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[path] = value
+    return flat
+
+
+def compare(current: dict, baseline: dict):
+    now, then = flatten(current['suites']), flatten(baseline['suites'])
+    print(f"\nChange vs {baseline.get('commit', '?')} ({baseline.get('timestamp', '?')}):")
+    for key in sorted(now):
+        if key in then and then[key] and '.params.' not in key and not key.endswith('count'):
+            change = (now[key] - then[key]) / abs(then[key]) * 100
+            print(f'  {key:<55} {then[key]:>14,.3f} -> {now[key]:>14,.3f}  {change:+7.1f}%')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--only', choices=sorted(SUITES), action='append', help='run only these suites')
+    parser.add_argument('--quick', action='store_true', help='small sizes, for a smoke run')
+    parser.add_argument('--baseline', help='earlier results file to compare against')
+    parser.add_argument('--output', help='results file (default: results/<timestamp>-<commit>.json)')
+    args = parser.parse_args()
+
+    commit = git_commit()
+    timestamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+    results = {'commit': commit, 'timestamp': timestamp, 'python': sys.version.split()[0], 'suites': {}}
+    for name in args.only or SUITES:
+        print(f'Running {name}...', flush=True)
+        results['suites'][name] = run_suite(name, args.quick)
+
+    output = args.output or os.path.join(RESULTS_DIR, f'{timestamp}-{commit}.json')
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f'Results saved to {output}')
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare(results, json.load(f))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+
+import re
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    from scipy.special import ndtr as norm_cdf
+except ImportError:
+    def norm_cdf(x: np.ndarray) -> np.ndarray:
+        """Standard normal CDF via the Abramowitz-Stegun 7.1.26 erf approximation (|error| < 1.5e-7)."""
+        z = np.abs(x) / np.sqrt(2.0)
+        t = 1.0 / (1.0 + 0.3275911 * z)
+        poly = t * (0.254829592 + t * (-0.284496736 + t * (1.421413741 + t * (-1.453152027 + t * 1.061405429))))
+        erf = 1.0 - poly * np.exp(-z * z)
+        return 0.5 * (1.0 + np.sign(x) * erf)
+
+
+SECONDS_PER_YEAR = 365.0 * 24 * 3600
+MIN_TIME = 1e-6  # years; keeps expiring contracts finite
+# dxFeed option streamer symbols, e.g. .SPY250117C500 or .SPXW250117P4850.5
+OPTION_SYMBOL_RE = re.compile(r'^\.(?P<root>[A-Z0-9/]+?)(?P<expiry>\d{6})(?P<right>[CP])(?P<strike>\d+(?:\.\d+)?)$')
+
+
+def norm_pdf(x: np.ndarray) -> np.ndarray:
+    return np.exp(-0.5 * x * x) / np.sqrt(2.0 * np.pi)
+
+
+def black_scholes(spot, strike, t, vol, is_call, rate: float = 0.0, div: float = 0.0) -> Dict[str, np.ndarray]:
+    """
+    Black-Scholes price, delta, gamma and vega (per 1.00 vol) for arrays of contracts.
+
+    All arguments broadcast against each other; t is in years.
+    """
+    spot = np.asarray(spot, dtype=np.float64)
+    strike = np.asarray(strike, dtype=np.float64)
+    t = np.maximum(np.asarray(t, dtype=np.float64), MIN_TIME)
+    vol = np.asarray(vol, dtype=np.float64)
+    is_call = np.asarray(is_call, dtype=bool)
+
+    sqrt_t = np.sqrt(t)
+    vol_sqrt_t = vol * sqrt_t
+    with np.errstate(divide='ignore', invalid='ignore'):
+        d1 = (np.log(spot / strike) + (rate - div + 0.5 * vol * vol) * t) / vol_sqrt_t
+    d2 = d1 - vol_sqrt_t
+    disc_r = np.exp(-rate * t)
+    disc_q = np.exp(-div * t)
+
+    nd1 = norm_cdf(d1)
+    nd2 = norm_cdf(d2)
+    call = spot * disc_q * nd1 - strike * disc_r * nd2
+    put = call - spot * disc_q + strike * disc_r  # put-call parity
+    pdf_d1 = norm_pdf(d1)
+    return {
+        'price': np.where(is_call, call, put),
+        'delta': np.where(is_call, disc_q * nd1, disc_q * (nd1 - 1.0)),
+        'gamma': disc_q * pdf_d1 / (spot * vol_sqrt_t),
+        'vega': spot * disc_q * pdf_d1 * sqrt_t,
+    }
+
+
+def parse_option_symbol(symbol: str) -> Optional[Tuple[str, np.datetime64, bool, float]]:
+    """(underlying, expiry date, is_call, strike) for a dxFeed option symbol, or None for non-options."""
+    match = OPTION_SYMBOL_RE.match(symbol)
+    if match is None:
+        return None
+    expiry = datetime.strptime(match['expiry'], '%y%m%d')
+    return match['root'], np.datetime64(expiry.date(), 'D'), match['right'] == 'C', float(match['strike'])
+
+
+class OptionBook:
+    """
+    Option positions held as parallel NumPy arrays and revalued in one vectorized pass.
+
+    Greeks are cached per position; update_spots() only recomputes the positions
+    whose underlying price actually moved.
+    """
+
+    # Options are treated as expiring at 21:00 UTC (the 16:00 ET close in winter)
+    EXPIRY_TIME = np.timedelta64(21, 'h')
+
+    def __init__(self, symbols: List[str], underlyings: List[str], strikes, expiries, is_call, quantities, vols,
+                 multiplier: float = 100.0, rate: float = 0.0):
+        self.symbols = list(symbols)
+        self.underlying_names = sorted(set(underlyings))
+        self._underlying_index = {name: i for i, name in enumerate(self.underlying_names)}
+        self.underlying = np.array([self._underlying_index[u] for u in underlyings], dtype=np.int32)
+        self.strike = np.asarray(strikes, dtype=np.float64)
+        self.expiry = np.asarray(expiries, dtype='datetime64[D]') + self.EXPIRY_TIME
+        self.is_call = np.asarray(is_call, dtype=bool)
+        self.quantity = np.asarray(quantities, dtype=np.float64)
+        self.vol = np.asarray(vols, dtype=np.float64)
+        self.multiplier = multiplier
+        self.rate = rate
+
+        n = len(self.symbols)
+        self.spots = np.full(len(self.underlying_names), np.nan)
+        self.price = np.full(n, np.nan)
+        self.delta = np.full(n, np.nan)
+        self.gamma = np.full(n, np.nan)
+        self.vega = np.full(n, np.nan)
+
+    @classmethod
+    def from_symbols(cls, symbols: List[str], quantities, vols, **kwargs) -> 'OptionBook':
+        """Build a book from dxFeed option symbols such as .SPY250117C500."""
+        parsed = [parse_option_symbol(s) for s in symbols]
+        bad = [s for s, p in zip(symbols, parsed) if p is None]
+        if bad:
+            raise ValueError(f"Not option symbols: {bad}")
+        underlyings, expiries, is_call, strikes = zip(*parsed) if parsed else ((), (), (), ())
+        return cls(symbols, list(underlyings), strikes, expiries, is_call, quantities, vols, **kwargs)
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def time_to_expiry(self, now: Optional[datetime] = None) -> np.ndarray:
+        now = np.datetime64(now or datetime.now(timezone.utc).replace(tzinfo=None), 's')
+        return (self.expiry - now) / np.timedelta64(1, 's') / SECONDS_PER_YEAR
+
+    def revalue(self, mask: Optional[np.ndarray] = None, now: Optional[datetime] = None):
+        """Recompute price and greeks for the positions in mask (all positions by default)."""
+        idx = slice(None) if mask is None else mask
+        t = self.time_to_expiry(now)[idx]
+        greeks = black_scholes(self.spots[self.underlying[idx]], self.strike[idx], t, self.vol[idx],
+                               self.is_call[idx], self.rate)
+        self.price[idx] = greeks['price']
+        self.delta[idx] = greeks['delta']
+        self.gamma[idx] = greeks['gamma']
+        self.vega[idx] = greeks['vega']
+
+    def update_spots(self, spots: Dict[str, float], now: Optional[datetime] = None) -> int:
+        """Apply new underlying prices and revalue only the positions on underlyings that moved."""
+        changed = []
+        for name, spot in spots.items():
+            i = self._underlying_index.get(name)
+            if i is not None and spot != self.spots[i] and np.isfinite(spot):
+                self.spots[i] = spot
+                changed.append(i)
+        if not changed:
+            return 0
+        mask = np.isin(self.underlying, changed)
+        self.revalue(mask, now)
+        return int(mask.sum())
+
+    def update_from_quote_store(self, quote_store, now: Optional[datetime] = None) -> int:
+        """Use the latest underlying mids from a QuoteStore."""
+        symbols, values, _ = quote_store.snapshot()
+        mids = (values[:, 0] + values[:, 1]) / 2
+        return self.update_spots({s: m for s, m in zip(symbols, mids) if s in self._underlying_index}, now)
+
+    def set_vols(self, vols, mask: Optional[np.ndarray] = None, now: Optional[datetime] = None):
+        """Replace volatilities (e.g. freshly solved implied vols) and revalue the affected positions."""
+        idx = slice(None) if mask is None else mask
+        self.vol[idx] = vols
+        self.revalue(mask, now)
+
+    def position_greeks(self) -> Dict[str, np.ndarray]:
+        """Greeks scaled by quantity and contract multiplier."""
+        size = self.quantity * self.multiplier
+        return {
+            'value': self.price * size,
+            'delta': self.delta * size,
+            'gamma': self.gamma * size,
+            'vega': self.vega * size,
+        }
+
+    def net_delta_by_underlying(self) -> Dict[str, float]:
+        """Share-equivalent delta per underlying, i.e. the hedge the book needs (with opposite sign)."""
+        sums = np.bincount(self.underlying, weights=np.nan_to_num(self.position_greeks()['delta']),
+                           minlength=len(self.underlying_names))
+        return {name: float(total) for name, total in zip(self.underlying_names, sums)}
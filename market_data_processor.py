@@ -5,73 +5,127 @@ import ssl
 import websocket
 from websocket_init import TastyworksSession
 import json
+import logging
+import random
+import time
+import numpy as np
 import pandas as pd
 from typing import List, Tuple, Any, Dict
-from datetime import datetime, timedelta
+from datetime import datetime
 import sys
+import threading
 from tabulate import tabulate
-import yfinance as yf
+from quote_store import QuoteStore
+from prev_close import PreviousCloseProvider, YFinancePreviousCloseProvider
+from tick_recorder import TickRecorder, TickReplay
+from quote_analytics import QuoteAnalytics
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Pass at most `burst` records per message template every `interval` seconds.
+
+    Only records below `max_level` are limited, so repeated warnings and errors
+    (reconnect failures, auth errors) are always logged.
+    """
+
+    def __init__(self, interval: float = 5.0, burst: int = 1, max_level: int = logging.WARNING):
+        super().__init__()
+        self.interval = interval
+        self.burst = burst
+        self.max_level = max_level
+        self._windows = {}
+        # Records arrive from the websocket, keepalive and timer threads
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= self.max_level:
+            return True
+        now = time.monotonic()
+        with self._lock:
+            start, count = self._windows.get(record.msg, (now, 0))
+            if now - start >= self.interval:
+                start, count = now, 0
+            self._windows[record.msg] = (start, count + 1)
+        return count < self.burst
+
+
+logger.addFilter(RateLimitFilter())
+
+# Quote fields requested in FEED_SETUP; COMPACT records repeat them in this order
+QUOTE_FIELDS = ["eventType", "eventSymbol", "bidPrice", "askPrice", "bidSize", "askSize", "bidTime", "askTime"]
+# Exchange timestamps (epoch milliseconds, 0 when that side has no quote)
+EXCHANGE_TIME_FIELDS = ["bidTime", "askTime"]
+
+
+def decode_compact_quotes(market_data: List[Any],
+                          fields: List[str] = QUOTE_FIELDS) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Decode a flat COMPACT Quote array into (symbols, values, exchange_ts).
+
+    values is a float64 array with one column per QuoteStore.FIELDS entry.
+    dxFeed's "NaN"/"Infinity" strings and nulls all come back as NaN.
+    exchange_ts is the later of bidTime/askTime in epoch seconds, NaN if unknown.
+    """
+    stride = len(fields)
+    n = len(market_data) // stride
+    records = np.asarray(market_data[:n * stride], dtype=object).reshape(n, stride)
+    symbols = records[:, fields.index('eventSymbol')]
+    values = records[:, [fields.index(f) for f in QuoteStore.FIELDS]].astype(np.float64)
+    values[~np.isfinite(values)] = np.nan
+    time_columns = [fields.index(f) for f in EXCHANGE_TIME_FIELDS if f in fields]
+    if time_columns:
+        times = records[:, time_columns].astype(np.float64)
+        times[~(times > 0)] = np.nan
+        # fmax ignores NaN, so one missing side does not hide the other
+        exchange_ts = np.fmax.reduce(times, axis=1) / 1000.0
+    else:
+        exchange_ts = np.full(n, np.nan)
+    return symbols, values, exchange_ts
 
 
 class MarketDataProcessor:
-    def __init__(self, token: str, symbols: List[str]):
+    def __init__(self, token: str, symbols: List[str], history_size: int = 0, verbose: bool = False,
+                 token_provider=None, prev_close_provider: PreviousCloseProvider = None,
+                 analytics_windows: Tuple[float, ...] = (60.0, 300.0)):
         self.ws_url = 'wss://tasty-openapi-ws.dxfeed.com/realtime'
         self.channel_number = 3
         self.token = token
         self.symbols = symbols
+        self.prev_close_provider = prev_close_provider or YFinancePreviousCloseProvider()
         self.prev_close_prices = self.get_previous_close_prices()
-        self.ws_client = MarketDataWebSocket(self.ws_url, self.token, self.channel_number)
+        self.ws_client = MarketDataWebSocket(self.ws_url, self.token, self.channel_number, history_size, verbose,
+                                             token_provider)
         self.ws_client.set_prev_close_prices(self.prev_close_prices)
+        # Rolling spread/volatility/quote-rate statistics, updated on every FEED_DATA batch
+        self.analytics = QuoteAnalytics(analytics_windows)
+        self.analytics.set_prev_close(self.prev_close_prices)
+        self.ws_client.analytics = self.analytics
+        # Aligned once so each snapshot is a vectorized reindex rather than a dict map
+        self.prev_close_series = pd.Series(self.prev_close_prices, dtype=np.float64)
         self.columns_to_check = [
             'bidPrice', 'askPrice', 'bidSize', 'askSize', 
         ]
         self.numeric_columns = ['bidPrice', 'askPrice']
 
     def get_previous_close_prices(self) -> Dict[str, float]:
-        """Fetch previous day's closing prices for all symbols."""
-        prev_close_prices = {}
-        for symbol in self.symbols:
-            try:
-                # Get yesterday's date
-                yesterday = (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d')
-                # Fetch data using yfinance
-                ticker = yf.Ticker(symbol)
-                hist = ticker.history(start=yesterday)
-                if not hist.empty:
-                    prev_close_prices[symbol] = hist['Close'].iloc[-1]
-                    print(f"Previous close for {symbol}: {prev_close_prices[symbol]}")
-                else:
-                    print(f"No data found for {symbol}")
-                    prev_close_prices[symbol] = None
-            except Exception as e:
-                print(f"Error fetching previous close for {symbol}: {e}")
-                prev_close_prices[symbol] = None
-        return prev_close_prices
+        """Fetch previous day's closing prices for all symbols from the configured provider."""
+        return self.prev_close_provider.get(self.symbols)
 
     def get_streamer_symbols(self) -> List[str]:
         """Retrieve symbols to track."""
         return self.symbols
 
-    def parse_market_data(self, received_data: List[Tuple[str, List[Any]]]) -> pd.DataFrame:
-        """Parse received WebSocket market data into a DataFrame."""
-        parsed_data = []
-        for item in received_data:
-            feed_type, market_data = item
-            for i in range(0, len(market_data), 6):
-                if i + 5 < len(market_data):
-                    parsed_data.append([
-                        feed_type,
-                        market_data[i],
-                        market_data[i+1],
-                        market_data[i+2],
-                        market_data[i+3],
-                        market_data[i+4],
-                        market_data[i+5]
-                    ])
-        df_parsed = pd.DataFrame(parsed_data, columns=[
-            'eventType', 'eventType2', 'streamer-symbol', 'bidPrice', 'askPrice', 'bidSize', 'askSize'
-        ])
-        return df_parsed.drop_duplicates(subset='streamer-symbol', keep='last')
+    def parse_market_data(self, quote_store: QuoteStore) -> pd.DataFrame:
+        """Build a DataFrame from the latest quote per symbol held in the store."""
+        symbols, values, _ = quote_store.snapshot()
+        df_parsed = pd.DataFrame(values, columns=list(QuoteStore.FIELDS))
+        df_parsed.insert(0, 'streamer-symbol', symbols)
+        df_parsed.insert(0, 'eventType2', 'Quote')
+        df_parsed.insert(0, 'eventType', 'Quote')
+        return df_parsed
 
     def convert_columns_to_numeric(self, df: pd.DataFrame) -> pd.DataFrame:
         """Convert specified columns to numeric, coercing errors."""
@@ -90,7 +144,7 @@ class MarketDataProcessor:
 
     def calculate_performance_metrics(self, df: pd.DataFrame) -> pd.DataFrame:
         """Calculate performance metrics based on previous close prices."""
-        df['prev_close'] = df['streamer-symbol'].map(self.prev_close_prices)
+        df['prev_close'] = self.prev_close_series.reindex(df['streamer-symbol']).to_numpy()
         df['price_change'] = df['midPrice'] - df['prev_close']
         df['price_change_pct'] = (df['price_change'] / df['prev_close'] * 100).round(2)
         return df
@@ -103,8 +157,76 @@ class MarketDataProcessor:
         self.ws_client.connect()
 
         # Parse received data
-        df_parsed = self.parse_market_data(self.ws_client.received_data)
+        df_parsed = self.parse_market_data(self.ws_client.quote_store)
+        return self.enrich_market_data(df_parsed)
 
+    def start_streaming(self) -> 'MarketDataProcessor':
+        """Open one long-lived feed channel on a background thread."""
+        symbols = self.get_streamer_symbols()
+        print(f'Symbols: {symbols}')
+        self.ws_client.set_symbols_to_track(symbols)
+        self.ws_client.start()
+        return self
+
+    def stop_streaming(self):
+        """Close the streaming channel and wait for the feed thread to exit."""
+        self.ws_client.stop()
+        self.stop_recording()
+
+    def start_recording(self, directory: str) -> TickRecorder:
+        """Capture every decoded quote to columnar segments under directory."""
+        self.ws_client.recorder = TickRecorder(directory)
+        return self.ws_client.recorder
+
+    def stop_recording(self):
+        recorder, self.ws_client.recorder = self.ws_client.recorder, None
+        if recorder is not None:
+            recorder.close()
+
+    def replay(self, directory: str, speed: float = None) -> pd.DataFrame:
+        """Feed a recorded session through the normal decode path, without a connection."""
+        replay = TickReplay(directory)
+        self.ws_client.set_symbols_to_track(self.get_streamer_symbols())
+        ticks = replay.replay(self.ws_client, speed)
+        print(f'Replayed {ticks} ticks from {directory}')
+        return self.get_latest_prices()
+
+    def wait_until_ready(self, timeout: float = None) -> bool:
+        """Block until every tracked symbol has been quoted at least once."""
+        return self.ws_client.all_received.wait(timeout)
+
+    def add_symbols(self, symbols: List[str]):
+        """Start streaming more symbols on the open channel; already tracked symbols are ignored."""
+        new_symbols = [s for s in dict.fromkeys(symbols) if s not in self.symbols]
+        if not new_symbols:
+            return
+        self.symbols += new_symbols
+        prices = self.prev_close_provider.get(new_symbols)
+        self.prev_close_prices.update(prices)
+        self.ws_client.set_prev_close_prices(self.prev_close_prices)
+        self.analytics.set_prev_close(prices)
+        self.prev_close_series = pd.Series(self.prev_close_prices, dtype=np.float64)
+        self.ws_client.subscribe(new_symbols)
+
+    def remove_symbols(self, symbols: List[str]):
+        """Stop streaming symbols without reconnecting."""
+        removed = [s for s in dict.fromkeys(symbols) if s in self.symbols]
+        if not removed:
+            return
+        self.symbols = [s for s in self.symbols if s not in removed]
+        self.ws_client.unsubscribe(removed)
+        self.analytics.remove(removed)
+        for symbol in removed:
+            self.prev_close_prices.pop(symbol, None)
+        self.prev_close_series = pd.Series(self.prev_close_prices, dtype=np.float64)
+
+    def get_latest_prices(self) -> pd.DataFrame:
+        """Non-blocking snapshot of the latest quote per symbol while streaming."""
+        df_parsed = self.parse_market_data(self.ws_client.quote_store)
+        return self.enrich_market_data(df_parsed)
+
+    def enrich_market_data(self, df_parsed: pd.DataFrame) -> pd.DataFrame:
+        """Add mid prices and performance metrics to parsed quotes."""
         # Process numeric columns
         df_parsed = self.convert_columns_to_numeric(df_parsed)
 
@@ -114,8 +236,29 @@ class MarketDataProcessor:
         # Calculate performance metrics
         df_parsed = self.calculate_performance_metrics(df_parsed)
 
+        df_parsed = self.calculate_spread_metrics(df_parsed)
+
         # Reorder and return
-        return self.reorder_columns(df_parsed, ['midPrice', 'prev_close', 'price_change', 'price_change_pct'])
+        return self.reorder_columns(df_parsed, ['midPrice', 'prev_close', 'price_change', 'price_change_pct',
+                                                'bidoffer', 'bidoffer_pct', 'bidoffer_bp'])
+
+    def calculate_spread_metrics(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Bid/offer spread in price, percent and basis points of mid, in one vectorized assign."""
+        spread = df['askPrice'] - df['bidPrice']
+        return df.assign(
+            bidoffer=spread,
+            bidoffer_pct=(spread / df['midPrice'] * 100).round(2),
+            bidoffer_bp=(spread / df['midPrice'] * 10000).round(1),
+        )
+
+    def get_rolling_analytics(self) -> pd.DataFrame:
+        """Per-symbol rolling spread, mid volatility and quote-rate statistics, indexed by symbol."""
+        symbols, columns = self.analytics.snapshot()
+        return pd.DataFrame(columns, index=pd.Index(symbols, name='streamer-symbol'))
+
+    def tradeable_symbols(self, max_spread_bp: float = None, max_spread_ratio: float = 3.0) -> Dict[str, bool]:
+        """Symbols whose current market is tight enough to hedge into (see QuoteAnalytics.tradeable)."""
+        return self.analytics.tradeable(max_spread_bp, max_spread_ratio)
 
     def calculate_mid_prices(self, df: pd.DataFrame) -> pd.DataFrame:
         """Calculate mid prices."""
@@ -127,13 +270,52 @@ class MarketDataProcessor:
 
 
 class MarketDataWebSocket:
-    def __init__(self, ws_url: str, token: str, channel_number: int):
+    # Seconds; SETUP advertises KEEPALIVE_TIMEOUT, we send a KEEPALIVE well within it
+    KEEPALIVE_TIMEOUT = 120
+    KEEPALIVE_INTERVAL = 30
+    RECONNECT_BASE_DELAY = 1.0
+    RECONNECT_MAX_DELAY = 60.0
+
+    def __init__(self, ws_url: str, token: str, channel_number: int, history_size: int = 0,
+                 verbose: bool = False, token_provider=None):
         self.ws_url = ws_url
         self.token = token
+        # Callable returning a fresh streamer token, used before each reconnect
+        self.token_provider = token_provider
         self.channel_number = channel_number
+        self.verbose = verbose
         self.symbols_to_track = {}
-        self.received_data = []
+        self._unseen = 0
+        self.quote_store = QuoteStore(history_size=history_size)
         self.prev_close_prices = {}
+        # Optional TickRecorder and QuoteAnalytics fed with every decoded FEED_DATA batch
+        self.recorder = None
+        self.analytics = None
+        self.quote_fields = QUOTE_FIELDS
+        self.decode_seconds = 0.0
+        self.feed_messages = 0
+        self.ws = None
+        self._thread = None
+        self.all_received = threading.Event()
+
+        # Incremental FEED_SUBSCRIPTION changes, coalesced and sent together
+        self.subscription_batch_delay = 0.05
+        self._sub_lock = threading.RLock()
+        self._pending_add = set()
+        self._pending_remove = set()
+        # Unsubscribed symbols; ticks already in flight for them are dropped
+        self._dropped = frozenset()
+        self._flush_timer = None
+        self._feed_ready = False
+        self._session_established = False
+
+        # Connection supervision
+        self._stopping = threading.Event()
+        self._keepalive_thread = None
+        self.last_message_at = 0.0
+        self.reconnect_count = 0
+        self.total_downtime = 0.0
+        self._down_since = None
 
     def set_prev_close_prices(self, prev_close_prices: Dict[str, float]):
         """Set the previous closing prices for symbols."""
@@ -152,8 +334,85 @@ class MarketDataWebSocket:
         )
         self.ws.run_forever(sslopt={"cert_reqs": ssl.CERT_NONE})
 
+    def start(self):
+        """Keep a supervised connection open on a daemon thread, reconnecting until stop()."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run_supervised, name='dxfeed-stream', daemon=True)
+        self._thread.start()
+        self._keepalive_thread = threading.Thread(target=self._keepalive_loop, name='dxfeed-keepalive', daemon=True)
+        self._keepalive_thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stopping.set()
+        if self.ws is not None:
+            self.ws.close()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run_supervised(self):
+        attempt = 0
+        while not self._stopping.is_set():
+            self._session_established = False
+            self.connect()
+            if self._stopping.is_set():
+                break
+            if self._down_since is None:
+                self._down_since = time.monotonic()
+            # A session that got as far as FEED_CONFIG resets the backoff
+            attempt = 0 if self._session_established else attempt + 1
+            delay = min(self.RECONNECT_MAX_DELAY, self.RECONNECT_BASE_DELAY * 2 ** attempt)
+            delay = delay / 2 + random.uniform(0, delay / 2)
+            logger.warning("Feed disconnected, reconnecting in %.1fs (attempt %d)", delay, attempt + 1)
+            if self._stopping.wait(delay):
+                break
+            self.reconnect_count += 1
+            if self.token_provider is not None:
+                try:
+                    self.token = self.token_provider()
+                except Exception as e:
+                    logger.error("Streamer token refresh failed: %s", e)
+
+    def _keepalive_loop(self):
+        """Send KEEPALIVE on channel 0 and drop connections that have gone silent."""
+        while not self._stopping.wait(self.KEEPALIVE_INTERVAL):
+            ws = self.ws
+            if ws is None or not self._feed_ready:
+                continue
+            if time.monotonic() - self.last_message_at > self.KEEPALIVE_TIMEOUT:
+                logger.warning("No message for %ss, closing stale connection", self.KEEPALIVE_TIMEOUT)
+                ws.close()
+                continue
+            try:
+                ws.send(json.dumps({"type": "KEEPALIVE", "channel": 0}))
+            except Exception as e:
+                logger.error("Keepalive failed: %s", e)
+
+    def stale_symbols(self, max_age: float) -> Dict[str, float]:
+        """Tracked symbols whose last quote is older than max_age seconds."""
+        return self.quote_store.stale_symbols(max_age)
+
+    def metrics(self) -> Dict[str, Any]:
+        down_for = time.monotonic() - self._down_since if self._down_since is not None else 0.0
+        # Exchange-to-receive latency of the latest quote per symbol
+        latency = self.quote_store.feed_latency() * 1000
+        return {
+            'connected': self._feed_ready,
+            'reconnect_count': self.reconnect_count,
+            'total_downtime': self.total_downtime + down_for,
+            'current_downtime': down_for,
+            'last_message_age': time.monotonic() - self.last_message_at if self.last_message_at else None,
+            'feed_messages': self.feed_messages,
+            'decode_ms_mean': self.decode_seconds / self.feed_messages * 1000 if self.feed_messages else None,
+            'feed_latency_p50_ms': float(np.percentile(latency, 50)) if len(latency) else None,
+            'feed_latency_p99_ms': float(np.percentile(latency, 99)) if len(latency) else None,
+        }
+
     def on_open(self, ws):
-        print("### connection opened ###")
+        logger.info("### connection opened ###")
+        self._feed_ready = False
         setup_message = {
             "type": "SETUP",
             "channel": 0,
@@ -165,8 +424,11 @@ class MarketDataWebSocket:
 
     def on_message(self, ws, message):
         data = json.loads(message)
+        self.last_message_at = time.monotonic()
 
-        if data.get('type') == 'AUTH_STATE' and data.get('state') == 'UNAUTHORIZED':
+        if data.get('type') == 'KEEPALIVE':
+            ws.send(json.dumps({"type": "KEEPALIVE", "channel": 0}))
+        elif data.get('type') == 'AUTH_STATE' and data.get('state') == 'UNAUTHORIZED':
             ws.send(json.dumps({"type": "AUTH", "channel": 0, "token": self.token}))
         elif data.get('type') == 'AUTH_STATE' and data.get('state') == 'AUTHORIZED':
             ws.send(json.dumps({
@@ -182,79 +444,184 @@ class MarketDataWebSocket:
                 "acceptAggregationPeriod": 0.1,
                 "acceptDataFormat": "COMPACT",
                 "acceptEventFields": {
-                    "Quote": ["eventType", "eventSymbol", "bidPrice", "askPrice", "bidSize", "askSize"]
+                    "Quote": self.quote_fields
                 }
             }))
         elif data.get('type') == 'FEED_CONFIG' and data.get('channel') == self.channel_number:
-            ws.send(json.dumps({
-                "type": "FEED_SUBSCRIPTION",
-                "channel": self.channel_number,
-                "reset": True,
-                "add": [{"type": "Quote", "symbol": symbol} for symbol in self.symbols_to_track]
-            }))
+            with self._sub_lock:
+                # The reset carries the full current symbol set, so pending changes are included
+                self._pending_add.clear()
+                self._pending_remove.clear()
+                ws.send(json.dumps({
+                    "type": "FEED_SUBSCRIPTION",
+                    "channel": self.channel_number,
+                    "reset": True,
+                    "add": [{"type": "Quote", "symbol": symbol} for symbol in self.symbols_to_track]
+                }))
+                self._feed_ready = True
+                self._session_established = True
+            if self._down_since is not None:
+                # Subscriptions are restored, the outage is over
+                self.total_downtime += time.monotonic() - self._down_since
+                self._down_since = None
+                logger.info("Feed restored after %d reconnects", self.reconnect_count)
         elif data.get('type') == 'FEED_DATA' and data.get('channel') == self.channel_number:
-            feed_data = data['data']
-            self.received_data.append(feed_data)
-            
-            feed_type, market_data = feed_data
+            feed_type, market_data = data['data']
             if feed_type == "Quote":
-                # Process each quote
-                for i in range(1, len(market_data), 6):
-                    symbol = market_data[i]
-                    bid_price = float(market_data[i+2])
-                    ask_price = float(market_data[i+3])
-                    mid_price = (bid_price + ask_price) / 2
-                    
-                    # Calculate deviation from previous close if available
-                    if symbol in self.prev_close_prices and self.prev_close_prices[symbol] is not None:
-                        prev_close = self.prev_close_prices[symbol]
-                        price_change = mid_price - prev_close
-                        price_change_pct = (price_change / prev_close * 100)
-                        print(f"Symbol: {symbol}")
-                        print(f"Bid Price: {bid_price:.2f}")
-                        print(f"Ask Price: {ask_price:.2f}")
-                        print(f"Mid Price: {mid_price:.2f}")
-                        print(f"Previous Close: {prev_close:.2f}")
-                        print(f"Change: {price_change:+.2f} ({price_change_pct:+.2f}%)")
-                        print("---")
-                    
-                    if symbol in self.symbols_to_track:
-                        self.symbols_to_track[symbol] = True
-
+                ts = time.time()
+                symbols, values, exchange_ts = decode_compact_quotes(market_data, self.quote_fields)
+                if self._dropped:
+                    keep = ~np.isin(symbols, list(self._dropped))
+                    symbols, values, exchange_ts = symbols[keep], values[keep], exchange_ts[keep]
+                self.quote_store.update_many(symbols, values, ts, exchange_ts)
+                if self.recorder is not None:
+                    self.recorder.append(symbols, values, ts, exchange_ts)
+                if self.analytics is not None:
+                    self.analytics.update(symbols, values, ts)
+                self.decode_seconds += time.time() - ts
+                self.feed_messages += 1
+                logger.debug("FEED_DATA: %d quotes", len(symbols))
+
+                if self._unseen:
+                    self._mark_seen(symbols)
+                if self.verbose:
+                    self.print_quotes(symbols, values)
+
+    def _mark_seen(self, symbols):
+        with self._sub_lock:
+            for symbol in symbols:
+                if self.symbols_to_track.get(symbol) is False:
+                    self.symbols_to_track[symbol] = True
+                    self._unseen -= 1
             if self.check_all_data_received():
-                print("all tickers received at least once...")
+                logger.info("all tickers received at least once...")
+                self.all_received.set()
+
+    def subscribe(self, symbols: List[str]):
+        """Add symbols to the live channel; changes within subscription_batch_delay go out as one message."""
+        with self._sub_lock:
+            for symbol in symbols:
+                if symbol in self.symbols_to_track:
+                    continue
+                self.symbols_to_track[symbol] = False
+                self._unseen += 1
+                self._dropped = self._dropped - {symbol}
+                if symbol in self._pending_remove:
+                    self._pending_remove.discard(symbol)
+                else:
+                    self._pending_add.add(symbol)
+            if self._unseen:
+                self.all_received.clear()
+            self._schedule_flush()
+
+    def unsubscribe(self, symbols: List[str]):
+        """Remove symbols from the live channel and from the quote store snapshot."""
+        with self._sub_lock:
+            removed = []
+            for symbol in symbols:
+                seen = self.symbols_to_track.pop(symbol, None)
+                if seen is None:
+                    continue
+                removed.append(symbol)
+                if seen is False:
+                    self._unseen -= 1
+                if symbol in self._pending_add:
+                    self._pending_add.discard(symbol)
+                else:
+                    self._pending_remove.add(symbol)
+            self.quote_store.remove(removed)
+            self._dropped = self._dropped | set(removed)
+            if self.check_all_data_received():
+                self.all_received.set()
+            self._schedule_flush()
+
+    def _schedule_flush(self):
+        if not self._feed_ready or self._flush_timer is not None:
+            # Before FEED_CONFIG the initial reset subscription picks the changes up
+            return
+        if self._pending_add or self._pending_remove:
+            self._flush_timer = threading.Timer(self.subscription_batch_delay, self._flush_subscriptions)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+
+    def _flush_subscriptions(self):
+        with self._sub_lock:
+            self._flush_timer = None
+            if not self._feed_ready:
+                return
+            message = {"type": "FEED_SUBSCRIPTION", "channel": self.channel_number}
+            if self._pending_add:
+                message["add"] = [{"type": "Quote", "symbol": symbol} for symbol in sorted(self._pending_add)]
+            if self._pending_remove:
+                message["remove"] = [{"type": "Quote", "symbol": symbol} for symbol in sorted(self._pending_remove)]
+            self._pending_add.clear()
+            self._pending_remove.clear()
+            if len(message) > 2:
+                self.ws.send(json.dumps(message))
+                logger.info("Subscription updated: +%d -%d", len(message.get("add", [])), len(message.get("remove", [])))
+
+    def print_quotes(self, symbols, values):
+        """Human-readable per-symbol output, only used in verbose mode."""
+        for symbol, (bid_price, ask_price, _, _) in zip(symbols, values):
+            mid_price = (bid_price + ask_price) / 2
+            
+            # Calculate deviation from previous close if available
+            if symbol in self.prev_close_prices and self.prev_close_prices[symbol] is not None:
+                prev_close = self.prev_close_prices[symbol]
+                price_change = mid_price - prev_close
+                price_change_pct = (price_change / prev_close * 100)
+                print(f"Symbol: {symbol}")
+                print(f"Bid Price: {bid_price:.2f}")
+                print(f"Ask Price: {ask_price:.2f}")
+                print(f"Mid Price: {mid_price:.2f}")
+                print(f"Previous Close: {prev_close:.2f}")
+                print(f"Change: {price_change:+.2f} ({price_change_pct:+.2f}%)")
+                print("---")
 
     def on_error(self, ws, error):
-        print(f"Error: {error}")
+        logger.error("Error: %s", error)
 
     def on_close(self, ws, close_status_code, close_msg):
-        print(f"### connection closed ### with status code: {close_status_code} and message: {close_msg}")
+        self._feed_ready = False
+        if self._down_since is None and not self._stopping.is_set():
+            self._down_since = time.monotonic()
+        logger.info("### connection closed ### with status code: %s and message: %s", close_status_code, close_msg)
 
     def check_all_data_received(self):
-        all_received = all(self.symbols_to_track.values())
-        print(f"Check all data received: {all_received}")
-        return all_received
+        return self._unseen == 0
 
     def set_symbols_to_track(self, symbols: List[str]):
-        self.symbols_to_track = {symbol: False for symbol in symbols}
-        print(f"Symbols to track initialized: {self.symbols_to_track}")
+        with self._sub_lock:
+            self.symbols_to_track = {symbol: False for symbol in symbols}
+            self._unseen = len(self.symbols_to_track)
+            self._dropped = frozenset()
+            self.quote_store.reset(symbols)
+            self.all_received.clear()
+        logger.info("Symbols to track initialized: %d", self._unseen)
 
 
-def px_flow(symbols: List[str]) -> MarketDataProcessor:
+def px_flow(symbols: List[str], verbose: bool = False,
+            prev_close_provider: PreviousCloseProvider = None) -> MarketDataProcessor:
     """
     Create and return a MarketDataProcessor instance.
     """
     creds_path = "/Users/michaelkilchenmann/icloud/C_Code/J_Workbench/AA_Libraries_Mutual/creds.yaml" if platform.system() == "Darwin" else "/home/ec2-user/tt/creds.yaml"
     session = TastyworksSession()
     streamer_token = session.run()
-    return MarketDataProcessor(streamer_token['data']['token'], symbols)
+
+    def refresh_token() -> str:
+        return TastyworksSession().run()['data']['token']
+
+    return MarketDataProcessor(streamer_token['data']['token'], symbols, verbose=verbose,
+                               token_provider=refresh_token, prev_close_provider=prev_close_provider)
 
 def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
     # Define the symbols to retrieve prices for
     symbols = ["MSTR", "MSTU"]
 
     # Create a MarketDataProcessor instance
-    processor = px_flow(symbols)
+    processor = px_flow(symbols, verbose='--verbose' in sys.argv)
 
     # Process and retrieve market data
     prices = processor.process_market_data()
@@ -263,12 +630,8 @@ def main():
     prices.insert(0, 'timestamp', ts)
     prices = prices[['timestamp', 'streamer-symbol', 'eventType', 'eventType2', 
                     'bidPrice', 'askPrice', 'midPrice', 'prev_close', 
-                    'price_change', 'price_change_pct', 'bidSize', 'askSize']]
-    prices.insert(10, 'bidoffer', prices['askPrice'] - prices['bidPrice'])
-    prices.insert(11, 'bidoffer_pct', (prices['askPrice'] - prices['bidPrice'])/prices['midPrice']*100)
-    prices.insert(12, 'bidoffer_bp', (prices['askPrice'] - prices['bidPrice'])/prices['midPrice']*10000)
-    prices['bidoffer_pct'] = prices['bidoffer_pct'].round(2)
-    prices['bidoffer_bp'] = prices['bidoffer_bp'].round(1)
+                    'price_change', 'price_change_pct', 'bidoffer', 'bidoffer_pct', 'bidoffer_bp',
+                    'bidSize', 'askSize']]
 
     # Display the retrieved prices
     print("Retrieved Prices:")
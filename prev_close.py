@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+
+import json
+import os
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+import pandas as pd
+
+
+class PreviousCloseProvider(ABC):
+    """Source of previous-session closing prices, pluggable into MarketDataProcessor."""
+
+    @abstractmethod
+    def get(self, symbols: List[str]) -> Dict[str, Optional[float]]:
+        """Previous close per symbol, None where it is unknown."""
+
+
+class StaticPreviousCloseProvider(PreviousCloseProvider):
+    """Fixed prices, e.g. for tests, offline runs or a broker summary feed."""
+
+    def __init__(self, prices: Dict[str, float]):
+        self.prices = dict(prices)
+
+    @classmethod
+    def from_file(cls, path: str) -> 'StaticPreviousCloseProvider':
+        """Load a {symbol: close} JSON file, or a CSV with symbol and close columns."""
+        if path.endswith('.csv'):
+            df = pd.read_csv(path)
+            return cls(dict(zip(df['symbol'], df['close'])))
+        with open(path) as f:
+            return cls(json.load(f))
+
+    def get(self, symbols: List[str]) -> Dict[str, Optional[float]]:
+        return {symbol: self.prices.get(symbol) for symbol in symbols}
+
+
+class YFinancePreviousCloseProvider(PreviousCloseProvider):
+    """
+    One batched yfinance download for all symbols, cached on disk per trading date.
+
+    Only daily bars dated before today's session are used, so an intraday
+    partial bar is never mistaken for the previous close. Restarts on the same
+    day are served from the cache without any network call. Symbols yfinance
+    cannot resolve (options, futures, delisted tickers) are cached as misses
+    and only retried after miss_ttl seconds.
+    """
+
+    def __init__(self, cache_dir: str = os.path.expanduser('~/.cache/tcn_delta_hedger'),
+                 exchange_tz: str = 'America/New_York', lookback: str = '10d', miss_ttl: float = 3600.0):
+        self.cache_dir = cache_dir
+        self.exchange_tz = ZoneInfo(exchange_tz)
+        self.lookback = lookback
+        self.miss_ttl = miss_ttl
+
+    def trading_date(self) -> str:
+        return datetime.now(self.exchange_tz).strftime('%Y-%m-%d')
+
+    def cache_path(self, trading_date: str) -> str:
+        return os.path.join(self.cache_dir, f'prev_close_{trading_date}.json')
+
+    def _load_cache(self, path: str) -> Tuple[Dict[str, float], Dict[str, float]]:
+        """(prices, misses) where misses maps a symbol to when a download last found nothing."""
+        try:
+            with open(path) as f:
+                cache = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}, {}
+        if 'prices' not in cache:
+            # Files written before misses were cached hold the prices only
+            return cache, {}
+        return cache['prices'], cache.get('misses', {})
+
+    def _save_cache(self, path: str, prices: Dict[str, float], misses: Dict[str, float]):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'prices': prices, 'misses': misses}, f)
+        os.replace(tmp_path, path)
+
+    def download(self, symbols: List[str], trading_date: str) -> Dict[str, float]:
+        import yfinance as yf
+
+        data = yf.download(symbols, period=self.lookback, interval='1d', auto_adjust=False,
+                           progress=False, threads=True)
+        if data.empty:
+            return {}
+        closes = data['Close']
+        if isinstance(closes, pd.Series):
+            closes = closes.to_frame(symbols[0])
+        # Drop today's (possibly partial) bar
+        closes = closes[closes.index.strftime('%Y-%m-%d') < trading_date]
+        prices = {}
+        for symbol in closes.columns:
+            column = closes[symbol].dropna()
+            if not column.empty:
+                prices[symbol] = float(column.iloc[-1])
+        return prices
+
+    def get(self, symbols: List[str]) -> Dict[str, Optional[float]]:
+        trading_date = self.trading_date()
+        path = self.cache_path(trading_date)
+        prices, misses = self._load_cache(path)
+        now = time.time()
+        missing = [symbol for symbol in symbols
+                   if symbol not in prices and now - misses.get(symbol, 0.0) >= self.miss_ttl]
+        if missing:
+            try:
+                found = self.download(missing, trading_date)
+            except Exception as e:
+                # A failed download says nothing about the symbols, so nothing is cached as a miss
+                print(f"Error fetching previous close for {missing}: {e}")
+            else:
+                prices.update(found)
+                misses.update({symbol: now for symbol in missing if symbol not in found})
+                self._save_cache(path, prices, misses)
+        for symbol in symbols:
+            if symbol not in prices:
+                print(f"No data found for {symbol}")
+        return {symbol: prices.get(symbol) for symbol in symbols}
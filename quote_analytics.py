@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Regular US session seconds per year, for annualizing intraday mid volatility
+TRADING_SECONDS_PER_YEAR = 252 * 6.5 * 3600
+
+
+class QuoteAnalytics:
+    """
+    Spread, mid volatility and quote-rate statistics per symbol, updated per tick.
+
+    Every window keeps three time-decayed sums per symbol: tick count, squared
+    mid log-return and spread in bp, each decayed by exp(-dt / window) since
+    the symbol's previous tick. A tick therefore costs O(1) per window whatever
+    the history length, and sum / window approximates the rate over the last
+    `window` seconds. One-sided quotes (a missing or non-positive price, or a
+    zero size) and crossed quotes leave the sums untouched and mark the
+    symbol's market invalid until the next two-sided quote.
+    """
+
+    def __init__(self, windows: Sequence[float] = (60.0, 300.0), capacity: int = 64):
+        self.windows = np.asarray(sorted(windows), dtype=np.float64)
+        self._lock = threading.Lock()
+        self._rows: Dict[str, int] = {}
+        self.symbols: List[str] = []
+        self._allocate(max(capacity, 1))
+
+    def _allocate(self, capacity: int):
+        w = len(self.windows)
+        self.last_ts = np.zeros(capacity)
+        self.mid = np.full(capacity, np.nan)
+        self.spread = np.full(capacity, np.nan)
+        self.prev_close = np.full(capacity, np.nan)
+        # Whether the latest quote was two-sided and not crossed
+        self.valid = np.zeros(capacity, dtype=bool)
+        # False for symbols removed from the subscription
+        self.active = np.zeros(capacity, dtype=bool)
+        self.tick_sum = np.zeros((capacity, w))
+        self.return_sq_sum = np.zeros((capacity, w))
+        self.spread_bp_sum = np.zeros((capacity, w))
+        # Average spread in bp before the latest tick, what tradeable() compares it with
+        self.spread_bp_prior = np.full((capacity, w), np.nan)
+
+    def _grow(self, capacity: int):
+        old = {name: getattr(self, name) for name in
+               ('last_ts', 'mid', 'spread', 'prev_close', 'valid', 'active',
+                'tick_sum', 'return_sq_sum', 'spread_bp_sum', 'spread_bp_prior')}
+        self._allocate(capacity)
+        for name, array in old.items():
+            getattr(self, name)[:len(array)] = array
+
+    def _row_for(self, symbol: str) -> int:
+        row = self._rows.get(symbol)
+        if row is None:
+            row = len(self.symbols)
+            if row == len(self.mid):
+                self._grow(2 * row)
+            self._rows[symbol] = row
+            self.symbols.append(symbol)
+        self.active[row] = True
+        return row
+
+    def set_prev_close(self, prices: Dict[str, Optional[float]]):
+        """Previous closes, looked up once here instead of on every snapshot."""
+        with self._lock:
+            for symbol, price in prices.items():
+                self.prev_close[self._row_for(symbol)] = np.nan if price is None else price
+
+    def remove(self, symbols):
+        """Drop unsubscribed symbols from snapshots; they start afresh if they come back."""
+        with self._lock:
+            rows = [self._rows[s] for s in symbols if s in self._rows]
+            self.active[rows] = False
+            self.valid[rows] = False
+            self.last_ts[rows] = 0.0
+            self.mid[rows] = np.nan
+            self.spread[rows] = np.nan
+            self.tick_sum[rows] = 0.0
+            self.return_sq_sum[rows] = 0.0
+            self.spread_bp_sum[rows] = 0.0
+            self.spread_bp_prior[rows] = np.nan
+
+    def update(self, symbols, values: np.ndarray, ts: Optional[float] = None):
+        """Fold a decoded batch (columns as QuoteStore.FIELDS) into the rolling sums."""
+        if len(symbols) == 0:
+            return
+        ts = time.time() if ts is None else ts
+        with self._lock:
+            rows = np.fromiter((self._row_for(s) for s in symbols), dtype=np.int64, count=len(symbols))
+            values = np.asarray(values)
+            # A symbol quoted twice in one batch is applied in order, one pass per repeat
+            while len(rows):
+                _, first = np.unique(rows, return_index=True)
+                self._apply(rows[first], values[first], ts)
+                if len(first) == len(rows):
+                    break
+                rest = np.ones(len(rows), dtype=bool)
+                rest[first] = False
+                rows, values = rows[rest], values[rest]
+
+    def _apply(self, rows: np.ndarray, values: np.ndarray, ts: float):
+        bid, ask, bid_size, ask_size = values[:, 0], values[:, 1], values[:, 2], values[:, 3]
+        mid = (bid + ask) / 2
+        spread = ask - bid
+        # A size the feed did not send (NaN) is not taken as an empty side
+        valid = (np.isfinite(mid) & (bid > 0) & (ask > 0) & (spread >= 0)
+                 & ~(bid_size <= 0) & ~(ask_size <= 0))
+        self.valid[rows] = valid
+        rows, mid, spread = rows[valid], mid[valid], spread[valid]
+        if not len(rows):
+            return
+
+        seen = self.last_ts[rows] > 0
+        decay = np.exp(-np.maximum(ts - self.last_ts[rows], 0)[:, None] / self.windows)
+        decay[~seen] = 0.0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            log_return = np.where(np.isfinite(self.mid[rows]), np.log(mid / self.mid[rows]), 0.0)
+            # Decay scales both sums alike, so the ratio is the average as of this tick
+            self.spread_bp_prior[rows] = self.spread_bp_sum[rows] / self.tick_sum[rows]
+
+        self.tick_sum[rows] = self.tick_sum[rows] * decay + 1.0
+        self.return_sq_sum[rows] = self.return_sq_sum[rows] * decay + (log_return ** 2)[:, None]
+        self.spread_bp_sum[rows] = self.spread_bp_sum[rows] * decay + (spread / mid * 1e4)[:, None]
+        self.mid[rows] = mid
+        self.spread[rows] = spread
+        self.last_ts[rows] = ts
+
+    def snapshot(self, now: Optional[float] = None) -> Tuple[List[str], Dict[str, np.ndarray]]:
+        """
+        (symbols, columns) for every symbol whose latest quote is two-sided. Columns are the
+        current spread, spread_pct, spread_bp, mid, prev_close, change and change_pct,
+        plus spread_bp_avg_<w>s, mid_vol_<w>s (annualized) and quote_rate_<w>s (per
+        second) for each window w.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            n = len(self.symbols)
+            seen = (self.last_ts[:n] > 0) & self.valid[:n] & self.active[:n]
+            symbols = [s for s, ok in zip(self.symbols, seen) if ok]
+            idx = np.flatnonzero(seen)
+            mid, spread, prev_close = self.mid[idx], self.spread[idx], self.prev_close[idx]
+            decay = np.exp(-np.maximum(now - self.last_ts[idx], 0)[:, None] / self.windows)
+            ticks = self.tick_sum[idx] * decay
+            return_sq = self.return_sq_sum[idx] * decay
+            spread_bp_avg = self.spread_bp_sum[idx] / self.tick_sum[idx]
+
+        columns = {
+            'mid': mid,
+            'spread': spread,
+            'spread_pct': spread / mid * 100,
+            'spread_bp': spread / mid * 1e4,
+            'prev_close': prev_close,
+            'change': mid - prev_close,
+            'change_pct': (mid - prev_close) / prev_close * 100,
+        }
+        for i, window in enumerate(self.windows):
+            label = f'{window:g}s'
+            columns[f'spread_bp_avg_{label}'] = spread_bp_avg[:, i]
+            columns[f'mid_vol_{label}'] = np.sqrt(return_sq[:, i] / window * TRADING_SECONDS_PER_YEAR)
+            columns[f'quote_rate_{label}'] = ticks[:, i] / window
+        return symbols, columns
+
+    def tradeable(self, max_spread_bp: Optional[float] = None, max_spread_ratio: float = 3.0,
+                  window: Optional[float] = None) -> Dict[str, bool]:
+        """
+        Whether each subscribed symbol's market is tight enough to hedge into: a latest
+        quote that is two-sided and not crossed, a spread within max_spread_bp (if
+        given), and no wider than max_spread_ratio times its own average over window
+        (the shortest window by default) up to the tick before.
+        """
+        i = 0 if window is None else int(np.flatnonzero(self.windows == window)[0])
+        with self._lock:
+            n = len(self.symbols)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                spread_bp = self.spread[:n] / self.mid[:n] * 1e4
+                average = self.spread_bp_prior[:n, i]
+            ok = np.isfinite(spread_bp) & (self.last_ts[:n] > 0) & self.valid[:n]
+            if max_spread_bp is not None:
+                ok &= spread_bp <= max_spread_bp
+            ok &= ~(spread_bp > max_spread_ratio * average)
+            return {symbol: bool(flag) for symbol, flag, active in zip(self.symbols, ok, self.active[:n])
+                    if active}
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+class QuoteStore:
+    """Latest quote per symbol held in preallocated NumPy arrays.
+
+    Each symbol owns one row; ticks overwrite that row in place, so memory
+    stays flat for the whole session and a snapshot costs O(symbols).
+    An optional ring buffer keeps the last ``history_size`` ticks.
+    """
+
+    FIELDS = ('bidPrice', 'askPrice', 'bidSize', 'askSize')
+
+    def __init__(self, symbols: Optional[List[str]] = None, capacity: int = 64, history_size: int = 0):
+        self._lock = threading.Lock()
+        self._rows: Dict[str, int] = {}
+        self.symbols: List[str] = []
+        capacity = max(capacity, len(symbols or []), 1)
+        self.values = np.full((capacity, len(self.FIELDS)), np.nan)
+        self.updated_at = np.zeros(capacity)
+        # Exchange time of the last quote (epoch seconds), NaN when the feed did not send one
+        self.exchange_at = np.full(capacity, np.nan)
+        self.update_count = np.zeros(capacity, dtype=np.int64)
+        # False for rows of symbols removed from the subscription
+        self.active = np.zeros(capacity, dtype=bool)
+
+        self.history_size = history_size
+        if history_size:
+            self._hist_row = np.zeros(history_size, dtype=np.int32)
+            self._hist_values = np.full((history_size, len(self.FIELDS)), np.nan)
+            self._hist_ts = np.zeros(history_size)
+            self._hist_pos = 0
+            self._hist_len = 0
+
+        for symbol in symbols or []:
+            self._row_for(symbol)
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def _row_for(self, symbol: str) -> int:
+        """Return the row for symbol, registering it (and growing the arrays) if new or removed."""
+        row = self._rows.get(symbol)
+        if row is None:
+            row = len(self.symbols)
+            if row == len(self.values):
+                self._grow(2 * row)
+            self._rows[symbol] = row
+            self.symbols.append(symbol)
+        self.active[row] = True
+        return row
+
+    def _grow(self, capacity: int):
+        values = np.full((capacity, len(self.FIELDS)), np.nan)
+        values[:len(self.values)] = self.values
+        updated_at = np.zeros(capacity)
+        updated_at[:len(self.updated_at)] = self.updated_at
+        exchange_at = np.full(capacity, np.nan)
+        exchange_at[:len(self.exchange_at)] = self.exchange_at
+        update_count = np.zeros(capacity, dtype=np.int64)
+        update_count[:len(self.update_count)] = self.update_count
+        active = np.zeros(capacity, dtype=bool)
+        active[:len(self.active)] = self.active
+        self.values, self.updated_at, self.update_count = values, updated_at, update_count
+        self.exchange_at, self.active = exchange_at, active
+
+    def reset(self, symbols: List[str]):
+        """Forget all quotes and register a fresh symbol set."""
+        with self._lock:
+            self._rows.clear()
+            self.symbols = []
+            self.values[:] = np.nan
+            self.updated_at[:] = 0.0
+            self.exchange_at[:] = np.nan
+            self.update_count[:] = 0
+            self.active[:] = False
+            if self.history_size:
+                self._hist_pos = 0
+                self._hist_len = 0
+            for symbol in symbols:
+                self._row_for(symbol)
+
+    def remove(self, symbols: List[str]):
+        """Hide symbols from snapshots and staleness checks; their rows are reused if they come back."""
+        with self._lock:
+            for symbol in symbols:
+                row = self._rows.get(symbol)
+                if row is not None:
+                    self.values[row] = np.nan
+                    self.updated_at[row] = 0.0
+                    self.exchange_at[row] = np.nan
+                    self.update_count[row] = 0
+                    self.active[row] = False
+
+    def update(self, symbol: str, bid: float, ask: float, bid_size: float, ask_size: float,
+               ts: Optional[float] = None, exchange_ts: Optional[float] = None):
+        """Overwrite the quote for one symbol in place."""
+        ts = time.time() if ts is None else ts
+        with self._lock:
+            row = self._row_for(symbol)
+            self.values[row] = (bid, ask, bid_size, ask_size)
+            self.updated_at[row] = ts
+            self.exchange_at[row] = np.nan if exchange_ts is None else exchange_ts
+            self.update_count[row] += 1
+            if self.history_size:
+                self._record(np.array([row]), self.values[row:row + 1], ts)
+
+    def update_many(self, symbols, values: np.ndarray, ts: Optional[float] = None,
+                    exchange_ts: Optional[np.ndarray] = None):
+        """
+        Overwrite quotes for a batch of symbols; later rows win on duplicates.
+        ts is the receive time, exchange_ts the per-quote exchange time (both epoch seconds).
+        """
+        if len(symbols) == 0:
+            return
+        ts = time.time() if ts is None else ts
+        with self._lock:
+            rows = np.fromiter((self._row_for(s) for s in symbols), dtype=np.int64, count=len(symbols))
+            self.values[rows] = values
+            self.updated_at[rows] = ts
+            self.exchange_at[rows] = np.nan if exchange_ts is None else exchange_ts
+            np.add.at(self.update_count, rows, 1)
+            if self.history_size:
+                self._record(rows, values, ts)
+
+    def _record(self, rows: np.ndarray, values: np.ndarray, ts: float):
+        """Append ticks to the history ring, overwriting the oldest entries."""
+        n = len(rows)
+        if n > self.history_size:
+            rows, values, n = rows[-self.history_size:], values[-self.history_size:], self.history_size
+        idx = (self._hist_pos + np.arange(n)) % self.history_size
+        self._hist_row[idx] = rows
+        self._hist_values[idx] = values
+        self._hist_ts[idx] = ts
+        self._hist_pos = (self._hist_pos + n) % self.history_size
+        self._hist_len = min(self._hist_len + n, self.history_size)
+
+    def snapshot(self) -> Tuple[List[str], np.ndarray, np.ndarray]:
+        """Copy of (symbols, values, updated_at) for every symbol quoted so far."""
+        with self._lock:
+            n = len(self.symbols)
+            seen = (self.update_count[:n] > 0) & self.active[:n]
+            symbols = [s for s, ok in zip(self.symbols, seen) if ok]
+            return symbols, self.values[:n][seen].copy(), self.updated_at[:n][seen].copy()
+
+    def get(self, symbol: str) -> Optional[np.ndarray]:
+        """Latest (bid, ask, bidSize, askSize) for one symbol, or None if never quoted."""
+        with self._lock:
+            row = self._rows.get(symbol)
+            if row is None or self.update_count[row] == 0 or not self.active[row]:
+                return None
+            return self.values[row].copy()
+
+    def feed_latency(self) -> np.ndarray:
+        """Receive minus exchange time (seconds) of the latest quote, for symbols whose feed sent one."""
+        with self._lock:
+            n = len(self.symbols)
+            latency = self.updated_at[:n] - self.exchange_at[:n]
+            return latency[(self.update_count[:n] > 0) & self.active[:n] & np.isfinite(latency)]
+
+    def oldest_quote_time(self, symbols: Optional[List[str]] = None) -> Optional[float]:
+        """
+        Epoch seconds of the stalest latest quote among symbols (every subscribed
+        symbol by default): its exchange time, or receive time where the feed sent
+        none. None if none of them has been quoted.
+        """
+        with self._lock:
+            if symbols is None:
+                rows = np.arange(len(self.symbols))
+            else:
+                rows = np.array([self._rows[s] for s in symbols if s in self._rows], dtype=np.int64)
+            rows = rows[(self.update_count[rows] > 0) & self.active[rows]]
+            if not len(rows):
+                return None
+            exchange_at = self.exchange_at[rows]
+            return float(np.where(np.isfinite(exchange_at), exchange_at, self.updated_at[rows]).min())
+
+    def stale_symbols(self, max_age: float, now: Optional[float] = None) -> Dict[str, float]:
+        """{symbol: seconds since last update} for subscribed symbols older than max_age (never quoted = inf)."""
+        now = time.time() if now is None else now
+        with self._lock:
+            n = len(self.symbols)
+            ages = np.where(self.update_count[:n] > 0, now - self.updated_at[:n], np.inf)
+            stale = (ages > max_age) & self.active[:n]
+            return {self.symbols[i]: float(ages[i]) for i in np.flatnonzero(stale)}
+
+    def history(self) -> Tuple[List[str], np.ndarray, np.ndarray]:
+        """Buffered ticks, oldest first, as (symbols, values, timestamps)."""
+        if not self.history_size:
+            return [], np.empty((0, len(self.FIELDS))), np.empty(0)
+        with self._lock:
+            start = (self._hist_pos - self._hist_len) % self.history_size
+            idx = (start + np.arange(self._hist_len)) % self.history_size
+            symbols = [self.symbols[r] for r in self._hist_row[idx]]
+            return symbols, self._hist_values[idx].copy(), self._hist_ts[idx].copy()
@@ -4,23 +4,104 @@ document.addEventListener('DOMContentLoaded', () => {
     const TRADE_API_URL = 'http://127.0.0.1:5000/trades';
     const OPTION_API_BASE = 'http://127.0.0.1:5000/option';
     const TOOLBAR_API_BASE = 'http://127.0.0.1:5000/toolbar';
+    const STREAM_URL = 'http://127.0.0.1:5000/stream';
+    const HEALTH_URL = 'http://127.0.0.1:5000/health';
+
+    // Risk figure name (as sent on the stream) -> result element
+    const RISK_RESULT_ELEMENTS = {
+        get_total_pnl_tos: 'get-total-pnl-result',
+        get_total_exposure: 'get-total-exposure-result',
+        get_opt_exposure: 'get-opt-exposure-result',
+        get_hedge_pnl_tos: 'get-hedge-pnl-result',
+        get_option_pnl_tos: 'get-option-pnl-result'
+    };
+    const latestRisk = {};
+    let streamConnected = false;
   
+    // Trades received so far, keyed like the backend trade store
+    const tradesByKey = new Map();
+    let tradeCursor = 0;
+
+    function tradeKey(trade) {
+        return `${trade['source']}:${trade['id'] ?? trade['exec-id']}`;
+    }
+
+    function sortedTrades() {
+        return Array.from(tradesByKey.values())
+            .sort((a, b) => (b['executed-at'] || '').localeCompare(a['executed-at'] || ''));
+    }
+
     async function fetchTrades() {
         try {
             logDebug('Fetching trades from backend...');
-            const response = await fetch(TRADE_API_URL);
+            const response = await fetch(`${TRADE_API_URL}?since=${tradeCursor}`);
             if (!response.ok) {
                 throw new Error(`HTTP error! Status: ${response.status}`);
             }
-            const trades = await response.json();
-            logDebug(`Fetched ${trades.length} trades successfully.`);
-            updateTable(trades);
+            const data = await response.json();
+            if (data.error) {
+                throw new Error(data.error);
+            }
+            const failedSources = Object.entries(data.errors || {});
+            if (failedSources.length > 0) {
+                logDebug(`Partial blotter, unavailable: ${failedSources.map(([name, error]) => `${name} (${error})`).join(', ')}`);
+            }
+            applyTradeUpdate(data);
         } catch (error) {
             logDebug(`Error fetching trades: ${error.message}`);
             displayErrorMessage('Unable to fetch trades. Please check the backend and API URL.');
         }
     }
   
+    // Merge a {cursor, trades} delta from /trades or the stream into the table
+    function applyTradeUpdate(data) {
+        const isFirstLoad = tradeCursor === 0;
+        data.trades.forEach(trade => tradesByKey.set(tradeKey(trade), trade));
+        tradeCursor = Math.max(tradeCursor, data.cursor);
+        logDebug(`Received ${data.trades.length} new or changed trades (cursor ${tradeCursor}).`);
+        if (isFirstLoad || data.trades.length > 0) {
+            updateTable(sortedTrades());
+        }
+    }
+
+    // Server-sent updates; polling only runs while this stream is down
+    function connectStream() {
+        if (!window.EventSource) {
+            return;
+        }
+        const source = new EventSource(STREAM_URL);
+        source.addEventListener('open', () => {
+            streamConnected = true;
+            logDebug('Live update stream connected.');
+        });
+        source.addEventListener('error', () => {
+            if (streamConnected) {
+                logDebug('Live update stream lost, falling back to polling.');
+            }
+            streamConnected = false;
+        });
+        source.addEventListener('hello', event => {
+            const data = JSON.parse(event.data);
+            if (data.cursor !== tradeCursor) {
+                // Catch up on anything missed while disconnected
+                fetchTrades();
+            }
+        });
+        source.addEventListener('trades', event => {
+            applyTradeUpdate(JSON.parse(event.data));
+        });
+        source.addEventListener('risk', event => {
+            const data = JSON.parse(event.data);
+            Object.assign(latestRisk, data.result);
+            Object.entries(data.result).forEach(([name, value]) => {
+                const elementId = RISK_RESULT_ELEMENTS[name];
+                if (elementId) {
+                    updateResult(elementId, { result: value, timestamp: data.timestamp });
+                }
+            });
+        });
+    }
+
     function updateTable(trades) {
         const tableBody = document.querySelector('.trade-table tbody');
         if (!tableBody) {
@@ -234,6 +315,21 @@ document.addEventListener('DOMContentLoaded', () => {
                 .catch(err => updateResult('get-option-pnl-result', { error: err.message }));
         });
 
+        // One idempotency key per hedger tick, so a retried request can never hedge twice
+        let hedgeTick = 0;
+        const hedgeRunId = Date.now().toString(36);
+        function pushHedgeTrades() {
+            hedgeTick += 1;
+            return fetch(`${OPTION_API_BASE}/push_hedge_trades`, {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                    'Idempotency-Key': `hedge-${hedgeRunId}-${hedgeTick}`
+                },
+                body: JSON.stringify({})
+            }).then(r => r.json());
+        }
+
         // Interval processing for options workflow:
         let intervalID = null;
         document.getElementById('start-interval-btn').addEventListener('click', () => {
@@ -245,16 +341,29 @@ document.addEventListener('DOMContentLoaded', () => {
             // Clear any existing interval:
             if (intervalID) clearInterval(intervalID);
             intervalID = setInterval(() => {
+                if (streamConnected && latestRisk.get_total_exposure !== undefined) {
+                    // Exposure and PnL arrive on the stream; only the hedge push needs a request
+                    pushHedgeTrades()
+                        .then(hedgeTrades => {
+                            const timestamp = new Date().toLocaleTimeString();
+                            document.getElementById('interval-status').innerText =
+                                `At ${timestamp}: Total Exposure = ${latestRisk.get_total_exposure}, Total PnL = ${latestRisk.get_total_pnl_tos}, Hedge trades: ${hedgeTrades.result || hedgeTrades.error}`;
+                        })
+                        .catch(error => {
+                            document.getElementById('interval-status').innerText = `Error: ${error.message}`;
+                        });
+                    return;
+                }
                 Promise.all([
-                    fetch(`${OPTION_API_BASE}/get_total_exposure`).then(r => r.json()),
-                    fetch(`${OPTION_API_BASE}/get_total_pnl_tos`).then(r => r.json()),
-                    fetch(`${OPTION_API_BASE}/push_hedge_trades`, { method: 'POST' }).then(r => r.json())
+                    fetch(`${OPTION_API_BASE}/snapshot`).then(r => r.json()),
+                    pushHedgeTrades()
                 ])
                     .then(results => {
-                        const [totalExposure, totalPnl, hedgeTrades] = results;
+                        const [snapshot, hedgeTrades] = results;
+                        const figures = snapshot.result || {};
                         const timestamp = new Date().toLocaleTimeString();
                         document.getElementById('interval-status').innerText =
-                            `At ${timestamp}: Total Exposure = ${totalExposure.result}, Total PnL = ${totalPnl.result}, Hedge trades: ${hedgeTrades.result || hedgeTrades.error}`;
+                            `At ${timestamp}: Total Exposure = ${figures.get_total_exposure}, Total PnL = ${figures.get_total_pnl_tos}, Hedge trades: ${hedgeTrades.result || hedgeTrades.error}`;
                     })
                     .catch(error => {
                         document.getElementById('interval-status').innerText = `Error: ${error.message}`;
@@ -283,21 +392,73 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     }
 
-    // Initialize trade fetching with a delay
-    setTimeout(() => {
-        fetchTrades();
-        // Then fetch every 5 seconds
-        setInterval(fetchTrades, 5000);
-    }, 3000);
+    // Poll /health until the backend has warmed up or a required step failed, reporting progress
+    async function waitForBackend() {
+        while (true) {
+            try {
+                const response = await fetch(HEALTH_URL);
+                const health = await response.json();
+                if (health.ready) {
+                    return health;
+                }
+                if (health.status === 'failed') {
+                    const failed = Object.entries(health.steps)
+                        .filter(([, step]) => step.state === 'failed' && step.required)
+                        .map(([name, step]) => `${name} (${step.error})`);
+                    updateStatusBar(`Backend warm-up failed: ${failed.join(', ')}`, true);
+                    displayErrorMessage(`Backend warm-up failed: ${failed.join(', ')}. Retrying every 5 seconds.`);
+                    return health;
+                }
+                const running = Object.entries(health.steps)
+                    .filter(([, step]) => step.state === 'running')
+                    .map(([name]) => name);
+                updateStatusBar(`Backend warming up${running.length ? `: ${running.join(', ')}` : '...'}`,
+                                health.status === 'failed');
+            } catch (error) {
+                updateStatusBar('Waiting for backend to start...');
+            }
+            await new Promise(resolve => setTimeout(resolve, 250));
+        }
+    }
 
-    // Initialize toolbar and status bar
+    // Initialize toolbar, status bar and options workflow right away; they only call the backend on click
     updateStatusBar('Application initializing...');
     initToolbar();
+    initOptionsWorkflow();
 
-    // Initialize options workflow independently
-    setTimeout(() => {
-        initOptionsWorkflow();
-        updateStatusBar('Application ready');
-    }, 3000);
+    // Start trade fetching once the backend reports ready (or has given up warming up)
+    waitForBackend().then(health => {
+        let streamStarted = false;
+        function startStream() {
+            if (!streamStarted) {
+                streamStarted = true;
+                connectStream();
+            }
+        }
+        if (health.ready) {
+            updateStatusBar(health.status === 'degraded' ? 'Application ready (some services unavailable)' : 'Application ready');
+            fetchTrades();
+            startStream();
+        }
+        // Then poll every 5 seconds while the live stream is unavailable
+        setInterval(async () => {
+            if (!streamStarted) {
+                // Warm-up failed: keep checking so a restarted backend is picked up
+                try {
+                    const recovered = await (await fetch(HEALTH_URL)).json();
+                    if (!recovered.ready) {
+                        return;
+                    }
+                    updateStatusBar('Application ready');
+                    startStream();
+                } catch (error) {
+                    return;
+                }
+            }
+            if (!streamConnected) {
+                fetchTrades();
+            }
+        }, 5000);
+    });
 });
   
\ No newline at end of file
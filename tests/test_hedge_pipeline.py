@@ -0,0 +1,157 @@
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+
+from hedger_engine import HedgerEngine  # noqa: E402
+from hedge_pipeline import HedgePushPipeline  # noqa: E402
+
+
+class LegacyOptions:
+    """An OptionsClass with only push_hedge_trades_tos(), like the production one."""
+
+    def __init__(self, engine=None):
+        self.exposure = 5000.0
+        self.pushes = 0
+        self.engine = engine
+        self.reader_blocked = None
+
+    def get_total_exposure(self):
+        return self.exposure
+
+    def push_hedge_trades_tos(self):
+        self.pushes += 1
+        if self.engine is not None:
+            entered = threading.Event()
+
+            def read():
+                with self.engine.read():
+                    entered.set()
+            threading.Thread(target=read, daemon=True).start()
+            self.reader_blocked = not entered.wait(0.1)
+
+
+class SplitOptions(LegacyOptions):
+    """An OptionsClass that returns its hedge orders before sending them."""
+
+    def __init__(self):
+        super().__init__()
+        self.sent = []
+
+    def hedge_orders(self):
+        return [{"symbol": "SPY", "quantity": -self.exposure / 500, "price": 500.0}]
+
+    def send_hedge_orders(self, orders):
+        self.sent.append(orders)
+
+
+class Blotter:
+    """Stands in for TradeStore.cursor/fills_since."""
+
+    def __init__(self):
+        self.fills = []
+
+    def cursor(self):
+        return len(self.fills)
+
+    def fills_since(self, cursor):
+        return len(self.fills), self.fills[cursor:]
+
+    def fill(self, symbol, action, quantity):
+        key = f"tasty:{len(self.fills)}"
+        self.fills.append((key, {"symbol": symbol, "action": action, "quantity": quantity}))
+
+
+def make_pipeline(options_cls=LegacyOptions, **kwargs):
+    engine = HedgerEngine(options_cls)
+    engine.reinit()
+    blotter = Blotter()
+    pipeline = HedgePushPipeline(engine, blotter.cursor, blotter.fills_since, 1000, **kwargs)
+    return pipeline, engine._options, blotter
+
+
+def test_legacy_push_waits_for_the_previous_one():
+    pipeline, options, _ = make_pipeline()
+    assert pipeline.submit()['status'] == 'sent'
+    result = pipeline.submit()
+    assert result['status'] == 'skipped'
+    assert result['working_exposure'] == -5000.0
+    assert options.pushes == 1
+
+
+def test_legacy_push_ignores_unrelated_fills():
+    pipeline, options, blotter = make_pipeline()
+    pipeline.submit()
+    blotter.fill('AAPL', 'Buy to Open', 10)
+    assert pipeline.submit()['status'] == 'skipped'
+    assert options.pushes == 1
+
+
+def test_legacy_push_clears_once_its_fills_land():
+    pipeline, options, _ = make_pipeline()
+    pipeline.submit()
+    options.exposure = 40.0
+    result = pipeline.submit()
+    assert result['status'] == 'skipped'
+    assert result['working_exposure'] == 0.0
+    assert 'below threshold' in result['result']
+
+
+def test_legacy_push_resends_when_exposure_moves_past_threshold():
+    pipeline, options, _ = make_pipeline()
+    pipeline.submit()
+    options.exposure = 50000.0
+    assert pipeline.submit()['status'] == 'sent'
+    assert options.pushes == 2
+
+
+def test_working_orders_expire():
+    pipeline, options, _ = make_pipeline(working_ttl=0.05)
+    pipeline.submit()
+    time.sleep(0.1)
+    assert pipeline.submit()['status'] == 'sent'
+    assert options.pushes == 2
+
+
+def test_reset_forgets_working_orders():
+    pipeline, options, _ = make_pipeline()
+    pipeline.submit()
+    assert pipeline.reset() == -5000.0
+    assert pipeline.submit()['status'] == 'sent'
+    assert options.pushes == 2
+
+
+def test_legacy_push_holds_the_write_lock():
+    engine = HedgerEngine(lambda: LegacyOptions(engine))
+    engine.reinit()
+    pipeline = HedgePushPipeline(engine, lambda: 0, lambda cursor: (cursor, []), 1000)
+    pipeline.submit()
+    assert engine._options.reader_blocked
+
+
+def test_split_push_nets_working_orders_until_filled():
+    pipeline, options, blotter = make_pipeline(SplitOptions)
+    assert pipeline.submit()['status'] == 'sent'
+    assert pipeline.submit()['status'] == 'skipped'
+    blotter.fill('AAPL', 'Sell to Open', 10)
+    assert pipeline.submit()['status'] == 'skipped'
+    blotter.fill('SPY', 'Sell to Open', 4)
+    options.exposure = 3000.0
+    result = pipeline.submit()
+    assert result['status'] == 'skipped'
+    assert result['working_exposure'] == -3000.0
+    assert len(options.sent) == 1
+
+
+def test_tick_to_order_uses_the_hedged_symbols():
+    asked = []
+
+    def quote_time(symbols):
+        asked.append(symbols)
+        return time.time() - 0.5
+    pipeline, _, _ = make_pipeline(SplitOptions, quote_time_fn=quote_time)
+    result = pipeline.submit()
+    assert asked == [["SPY"]]
+    assert result['tick_to_order_ms'] >= 500
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+
+import glob
+import json
+import os
+import queue
+import threading
+import time
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from quote_store import QuoteStore
+
+# Columns written per segment, one .npy file each
+COLUMNS = ('ts', 'exchange_ts', 'symbol') + QuoteStore.FIELDS
+
+
+class TickRecorder:
+    """
+    Appends decoded quotes to columnar NumPy segments on disk.
+
+    Ticks are copied into preallocated column buffers; a full buffer is handed
+    to a writer thread and saved as one segment directory holding a .npy file
+    per column, so the feed thread never waits on disk. Segments can be opened
+    memory-mapped for replay and analysis. symbols.json maps symbol ids back
+    to names.
+    """
+
+    def __init__(self, directory: str, segment_rows: int = 65536):
+        self.directory = directory
+        self.segment_rows = segment_rows
+        os.makedirs(directory, exist_ok=True)
+        self._symbol_ids = {}
+        self.symbols: List[str] = []
+        existing = sorted(glob.glob(os.path.join(directory, 'segment_*')))
+        self._segment = len(existing)
+        if existing:
+            with open(os.path.join(directory, 'symbols.json')) as f:
+                self.symbols = json.load(f)
+            self._symbol_ids = {s: i for i, s in enumerate(self.symbols)}
+        self._lock = threading.Lock()
+        self._new_buffers()
+        self._queue = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, name='tick-recorder', daemon=True)
+        self._writer.start()
+
+    def _new_buffers(self):
+        self._ts = np.empty(self.segment_rows)
+        self._exchange_ts = np.empty(self.segment_rows)
+        self._symbol = np.empty(self.segment_rows, dtype=np.int32)
+        self._values = np.empty((self.segment_rows, len(QuoteStore.FIELDS)))
+        self._rows = 0
+
+    def append(self, symbols, values: np.ndarray, ts: Optional[float] = None,
+               exchange_ts: Optional[np.ndarray] = None):
+        """Record one decoded FEED_DATA batch; all rows share the receive timestamp ts."""
+        ts = time.time() if ts is None else ts
+        exchange_ts = np.broadcast_to(np.nan if exchange_ts is None else exchange_ts, len(symbols))
+        ids = np.empty(len(symbols), dtype=np.int32)
+        with self._lock:
+            for i, symbol in enumerate(symbols):
+                sid = self._symbol_ids.get(symbol)
+                if sid is None:
+                    sid = self._symbol_ids[symbol] = len(self.symbols)
+                    self.symbols.append(symbol)
+                ids[i] = sid
+            start = 0
+            while start < len(ids):
+                take = min(len(ids) - start, self.segment_rows - self._rows)
+                end = self._rows + take
+                self._ts[self._rows:end] = ts
+                self._exchange_ts[self._rows:end] = exchange_ts[start:start + take]
+                self._symbol[self._rows:end] = ids[start:start + take]
+                self._values[self._rows:end] = values[start:start + take]
+                self._rows = end
+                start += take
+                if self._rows == self.segment_rows:
+                    self._rotate()
+
+    def _rotate(self):
+        if self._rows:
+            self._queue.put((self._segment, self._ts[:self._rows], self._exchange_ts[:self._rows],
+                             self._symbol[:self._rows], self._values[:self._rows], list(self.symbols)))
+            self._segment += 1
+            self._new_buffers()
+
+    def _write_loop(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                return
+            segment, ts, exchange_ts, symbol, values, symbols = item
+            path = os.path.join(self.directory, f'segment_{segment:06d}')
+            os.makedirs(path, exist_ok=True)
+            np.save(os.path.join(path, 'ts.npy'), ts)
+            np.save(os.path.join(path, 'exchange_ts.npy'), exchange_ts)
+            np.save(os.path.join(path, 'symbol.npy'), symbol)
+            for i, field in enumerate(QuoteStore.FIELDS):
+                np.save(os.path.join(path, f'{field}.npy'), np.ascontiguousarray(values[:, i]))
+            with open(os.path.join(self.directory, 'symbols.json'), 'w') as f:
+                json.dump(symbols, f)
+            self._queue.task_done()
+
+    def flush(self):
+        """Write out the partially filled segment and wait for the writer."""
+        with self._lock:
+            self._rotate()
+        self._queue.join()
+
+    def close(self):
+        self.flush()
+        self._queue.put(None)
+        self._writer.join()
+
+
+class TickReplay:
+    """Feeds a TickRecorder directory back through MarketDataWebSocket.on_message."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        with open(os.path.join(directory, 'symbols.json')) as f:
+            self.symbols: List[str] = json.load(f)
+        self.segments = sorted(glob.glob(os.path.join(directory, 'segment_*')))
+
+    def load_segment(self, path: str) -> dict:
+        segment = {}
+        for column in COLUMNS:
+            file = os.path.join(path, f'{column}.npy')
+            if os.path.exists(file):
+                segment[column] = np.load(file, mmap_mode='r')
+        # Recordings made before exchange times were captured
+        segment.setdefault('exchange_ts', np.full(len(segment['ts']), np.nan))
+        return segment
+
+    def batches(self) -> Iterator[Tuple[float, List[str], np.ndarray, np.ndarray]]:
+        """Yield (ts, symbols, values, exchange_ts) per recorded FEED_DATA message, in order."""
+        names = np.array(self.symbols, dtype=object)
+        for path in self.segments:
+            seg = self.load_segment(path)
+            ts = np.asarray(seg['ts'])
+            values = np.column_stack([seg[field] for field in QuoteStore.FIELDS])
+            bounds = np.flatnonzero(np.diff(ts)) + 1
+            for start, end in zip(np.r_[0, bounds], np.r_[bounds, len(ts)]):
+                yield (float(ts[start]), list(names[seg['symbol'][start:end]]), values[start:end],
+                       np.asarray(seg['exchange_ts'][start:end]))
+
+    def replay(self, ws_client, speed: Optional[float] = None) -> int:
+        """
+        Replay every batch as a COMPACT FEED_DATA message in the client's
+        quote_fields order. speed=None runs as fast as possible, 1.0 at recorded
+        pace, 2.0 twice as fast. Returns ticks sent.
+        """
+        fields = ws_client.quote_fields
+        ticks = 0
+        first_ts = started = None
+        for ts, symbols, values, exchange_ts in self.batches():
+            if speed:
+                if first_ts is None:
+                    first_ts, started = ts, time.monotonic()
+                delay = (ts - first_ts) / speed - (time.monotonic() - started)
+                if delay > 0:
+                    time.sleep(delay)
+            compact = []
+            exchange_ms = np.nan_to_num(exchange_ts * 1000).astype(np.int64).tolist()
+            for symbol, row, ms in zip(symbols, values.tolist(), exchange_ms):
+                event = dict(zip(QuoteStore.FIELDS, row), eventType='Quote', eventSymbol=symbol,
+                             bidTime=ms, askTime=ms)
+                compact += [event.get(field, 0) for field in fields]
+            message = {"type": "FEED_DATA", "channel": ws_client.channel_number, "data": ["Quote", compact]}
+            ws_client.on_message(None, json.dumps(message))
+            ticks += len(symbols)
+        return ticks